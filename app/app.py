@@ -3,6 +3,12 @@ from flask import Flask, jsonify
 from models import db
 from routes import register_routes
 from error_handlers import register_error_handlers
+from deadlines import register_deadlines
+from metrics import register_metrics
+from cli import register_commands
+from profiling import register_profiling
+from services.capacity_ledger import register_capacity_ledger
+from services.job_runner import register_job_runner
 
 
 app = Flask(__name__)
@@ -14,6 +20,84 @@ app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
 )
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Реализация хранимых функций: postgres (db/init.sql), python или auto (по диалекту БД)
+app.config['STORED_FUNCTIONS_BACKEND'] = os.getenv('STORED_FUNCTIONS_BACKEND', 'auto')
+
+# Частые запросы репозиториев через PREPARE/EXECUTE (только PostgreSQL; несовместимо
+# с пулерами в режиме транзакций, например PgBouncer pool_mode=transaction)
+app.config['PREPARED_STATEMENTS'] = os.getenv('PREPARED_STATEMENTS', 'false').lower() in ('1', 'true', 'yes')
+
+# Idempotency-Key: время хранения ответа, ожидание параллельного дубликата и аренда
+# выполняющегося запроса (должна быть больше самого долгого запроса, см. REQUEST_DEADLINE_MAX_MS)
+app.config['IDEMPOTENCY_TTL_SECONDS'] = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', 24 * 60 * 60))
+app.config['IDEMPOTENCY_WAIT_SECONDS'] = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS', 10))
+app.config['IDEMPOTENCY_LEASE_SECONDS'] = float(os.getenv('IDEMPOTENCY_LEASE_SECONDS', 300))
+
+# Поиск аренд по имени клиента: минимальное триграммное сходство для match=fuzzy
+app.config['CUSTOMER_SEARCH_MIN_SIMILARITY'] = float(os.getenv('CUSTOMER_SEARCH_MIN_SIMILARITY', 0.3))
+
+# Прогноз мощности: как долго переиспользуются загруженные из БД массивы
+app.config['FORECAST_SNAPSHOT_TTL_SECONDS'] = float(os.getenv('FORECAST_SNAPSHOT_TTL_SECONDS', 60))
+
+# Дедлайны запросов по классам эндпоинтов (мс), например REQUEST_DEADLINES_MS=search=20000,report=60000;
+# заголовок X-Request-Deadline-Ms переопределяет дедлайн не выше REQUEST_DEADLINE_MAX_MS
+app.config['REQUEST_DEADLINES_MS'] = {
+    'read': 5000,
+    'write': 10000,
+    'search': 15000,
+    'report': 30000,
+    **{
+        name.strip(): int(value)
+        for name, value in (
+            item.split('=', 1) for item in os.getenv('REQUEST_DEADLINES_MS', '').split(',') if item.strip()
+        )
+    }
+}
+app.config['REQUEST_DEADLINE_MAX_MS'] = int(os.getenv('REQUEST_DEADLINE_MAX_MS', 120000))
+app.config['REQUEST_LOCK_TIMEOUT_MS'] = int(os.getenv('REQUEST_LOCK_TIMEOUT_MS', 2000))
+
+# Выгрузка: максимальный размер пачки строк серверного курсора
+app.config['EXPORT_BATCH_SIZE'] = int(os.getenv('EXPORT_BATCH_SIZE', 10000))
+
+# Лента изменений (SSE): keepalive, очередь подписчика, срок хранения журнала и опрос журнала без уведомлений
+app.config['CHANGE_FEED_KEEPALIVE_SECONDS'] = float(os.getenv('CHANGE_FEED_KEEPALIVE_SECONDS', 15))
+app.config['CHANGE_FEED_QUEUE_SIZE'] = int(os.getenv('CHANGE_FEED_QUEUE_SIZE', 1000))
+app.config['CHANGE_FEED_RETENTION_HOURS'] = int(os.getenv('CHANGE_FEED_RETENTION_HOURS', 24))
+app.config['CHANGE_FEED_PURGE_INTERVAL_SECONDS'] = float(os.getenv('CHANGE_FEED_PURGE_INTERVAL_SECONDS', 600))
+app.config['CHANGE_FEED_POLL_INTERVAL_SECONDS'] = float(os.getenv('CHANGE_FEED_POLL_INTERVAL_SECONDS', 1))
+
+# Профилирование: без PROFILING_TOKEN отладочные эндпоинты и хуки не регистрируются
+app.config['PROFILING_TOKEN'] = os.getenv('PROFILING_TOKEN', '')
+app.config['PROFILE_OUTPUT_DIR'] = os.getenv('PROFILE_OUTPUT_DIR', '/tmp/energy-profiles')
+app.config['PROFILE_MAX_SECONDS'] = float(os.getenv('PROFILE_MAX_SECONDS', 120))
+app.config['PROFILE_SAMPLE_INTERVAL_MS'] = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', 5))
+# Файлы профилей удаляются при записи нового: старше срока хранения и сверх лимита количества
+app.config['PROFILE_RETENTION_HOURS'] = float(os.getenv('PROFILE_RETENTION_HOURS', 24))
+app.config['PROFILE_MAX_FILES'] = int(os.getenv('PROFILE_MAX_FILES', 200))
+
+# Журнал мощности горячих точек: без CAPACITY_LEDGER_POINTS аренды идут напрямую в БД
+app.config['CAPACITY_LEDGER_POINTS'] = [
+    int(point_id) for point_id in os.getenv('CAPACITY_LEDGER_POINTS', '').split(',') if point_id.strip()
+]
+# Точки делятся на CAPACITY_LEDGER_WORKERS слотов (point_id % слоты); процесс занимает первый
+# свободный слот, начиная с CAPACITY_LEDGER_WORKER_INDEX
+app.config['CAPACITY_LEDGER_WORKERS'] = int(os.getenv('CAPACITY_LEDGER_WORKERS', 1))
+app.config['CAPACITY_LEDGER_WORKER_INDEX'] = int(os.getenv('CAPACITY_LEDGER_WORKER_INDEX', 0))
+app.config['CAPACITY_LEDGER_WAL_DIR'] = os.getenv('CAPACITY_LEDGER_WAL_DIR', '/var/lib/energy-api/ledger')
+app.config['CAPACITY_LEDGER_FLUSH_INTERVAL_MS'] = float(os.getenv('CAPACITY_LEDGER_FLUSH_INTERVAL_MS', 200))
+app.config['CAPACITY_LEDGER_FLUSH_BATCH_SIZE'] = int(os.getenv('CAPACITY_LEDGER_FLUSH_BATCH_SIZE', 500))
+app.config['CAPACITY_LEDGER_RECONCILE_SECONDS'] = float(os.getenv('CAPACITY_LEDGER_RECONCILE_SECONDS', 60))
+
+# Фоновые задачи: воркеры в каждом процессе API (0 - только через flask run-jobs)
+app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', 2))
+app.config['JOB_POLL_INTERVAL_SECONDS'] = float(os.getenv('JOB_POLL_INTERVAL_SECONDS', 1))
+app.config['JOB_LEASE_SECONDS'] = float(os.getenv('JOB_LEASE_SECONDS', 300))
+app.config['JOB_MAX_ATTEMPTS'] = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+app.config['JOB_RETRY_BASE_SECONDS'] = float(os.getenv('JOB_RETRY_BASE_SECONDS', 5))
+app.config['JOB_RETRY_MAX_SECONDS'] = float(os.getenv('JOB_RETRY_MAX_SECONDS', 600))
+app.config['JOB_BATCH_SIZE'] = int(os.getenv('JOB_BATCH_SIZE', 1000))
+app.config['JOB_RETENTION_HOURS'] = int(os.getenv('JOB_RETENTION_HOURS', 7 * 24))
+
 # Инициализация базы данных
 db.init_app(app)
 
@@ -23,6 +107,24 @@ register_routes(app)
 # Регистрация обработчиков ошибок
 register_error_handlers(app)
 
+# Дедлайны запросов и таймауты PostgreSQL
+register_deadlines(app)
+
+# Счетчики запросов для /api/metrics
+register_metrics(app)
+
+# Регистрация CLI-команд
+register_commands(app)
+
+# Отладочное профилирование (только при заданном PROFILING_TOKEN)
+register_profiling(app)
+
+# Журнал мощности горячих точек (только при заданном CAPACITY_LEDGER_POINTS)
+register_capacity_ledger(app)
+
+# Фоновые задачи
+register_job_runner(app)
+
 
 # Health check endpoint
 @app.route('/api/health', methods=['GET'])
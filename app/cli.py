@@ -0,0 +1,90 @@
+import sys
+from datetime import date
+import click
+from flask import Flask, current_app
+from models import db, Company, EnergySupplyPoint, CompanyClient
+from repositories.stored_functions import compare_backends
+from services.export_service import ExportService, EXPORT_FORMATS
+from services.job_runner import get_job_runner
+from error_handlers import APIError
+
+
+def register_commands(app: Flask):
+    """Регистрация CLI-команд приложения (flask --app app <команда>)"""
+    
+    @app.cli.command('export')
+    @click.argument('table')
+    @click.option('--format', 'export_format', type=click.Choice(list(EXPORT_FORMATS)), default='csv')
+    @click.option('--include', default='', help='Присоединения через запятую: company,rented')
+    @click.option('--batch-size', type=int, default=None, help='Размер пачки строк')
+    @click.option('--output', '-o', type=click.Path(dir_okay=False, writable=True), default='-',
+                  help='Файл результата, по умолчанию stdout')
+    def export_command(table, export_format, include, batch_size, output):
+        """Выгрузить таблицу в CSV (COPY TO STDOUT), Arrow IPC или Parquet"""
+        export_service = ExportService()
+        try:
+            includes = export_service.validate(
+                table, export_format, [name for name in include.split(',') if name]
+            )
+        except APIError as error:
+            raise click.UsageError(error.message)
+        
+        batch_size = batch_size or current_app.config['EXPORT_BATCH_SIZE']
+        if output == '-':
+            export_service.write(table, export_format, includes, batch_size, sys.stdout.buffer)
+        else:
+            with open(output, 'wb') as file:
+                export_service.write(table, export_format, includes, batch_size, file)
+    
+    @app.cli.command('init-db')
+    @click.option('--seed', is_flag=True, help='Добавить тестовые данные, как в db/init.sql')
+    def init_db_command(seed):
+        """Создать таблицы по моделям (для SQLite и режима STORED_FUNCTIONS_BACKEND=python)"""
+        db.create_all()
+        if seed:
+            companies = [
+                Company(name='ЭнергоПром', registration_date=date(2020, 1, 15), status='active'),
+                Company(name='СилаТок', registration_date=date(2021, 3, 20), status='active'),
+                Company(name='МегаВатт', registration_date=date(2019, 11, 10), status='inactive'),
+            ]
+            db.session.add_all(companies)
+            db.session.flush()
+            points = [
+                EnergySupplyPoint(name='Точка А1', company_id=companies[0].id, connection_date=date(2020, 2, 1), max_power_kw=1000),
+                EnergySupplyPoint(name='Точка А2', company_id=companies[0].id, connection_date=date(2020, 5, 15), max_power_kw=1500),
+                EnergySupplyPoint(name='Точка Б1', company_id=companies[1].id, connection_date=date(2021, 4, 1), max_power_kw=2000),
+                EnergySupplyPoint(name='Точка В1', company_id=companies[2].id, connection_date=date(2020, 1, 10), max_power_kw=500),
+            ]
+            db.session.add_all(points)
+            db.session.flush()
+            db.session.add_all([
+                CompanyClient(energy_supply_point_id=points[0].id, company_name='Клиент 1', quantity_power=300),
+                CompanyClient(energy_supply_point_id=points[0].id, company_name='Клиент 2', quantity_power=200),
+                CompanyClient(energy_supply_point_id=points[1].id, company_name='Клиент 3', quantity_power=500),
+            ])
+        db.session.commit()
+        click.echo('Database initialized')
+    
+    @app.cli.command('check-parity')
+    def check_parity_command():
+        """Сравнить хранимые функции PostgreSQL и их Python-реализацию на текущих данных"""
+        if db.engine.dialect.name != 'postgresql':
+            raise click.UsageError('Parity check requires a PostgreSQL database')
+        
+        mismatches = compare_backends()
+        db.session.rollback()
+        for mismatch in mismatches:
+            click.echo(mismatch, err=True)
+        if mismatches:
+            raise click.ClickException(f'{len(mismatches)} mismatches between backends')
+        click.echo('Stored function backends are identical')
+    
+    @app.cli.command('run-jobs')
+    @click.option('--workers', type=int, default=None, help='Количество воркеров (по умолчанию JOB_WORKERS)')
+    def run_jobs_command(workers):
+        """Обслуживать очередь фоновых задач в отдельном процессе"""
+        workers = current_app.config['JOB_WORKERS'] if workers is None else workers
+        if workers <= 0:
+            raise click.UsageError('--workers must be greater than 0')
+        click.echo(f'Running {workers} job workers, press Ctrl+C to stop')
+        get_job_runner().run_forever(workers)
@@ -0,0 +1,102 @@
+import time
+from contextlib import contextmanager
+from typing import Optional
+from flask import Flask, current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from error_handlers import ValidationError, DeadlineExceededError
+
+
+DEADLINE_HEADER = 'X-Request-Deadline-Ms'
+
+# Класс потоковых эндпоинтов (выгрузка, SSE): дедлайн и statement_timeout не применяются
+STREAMING = 'stream'
+
+
+def deadline(endpoint_class: str):
+    """
+    Декоратор маршрута: класс эндпоинта для дедлайна из REQUEST_DEADLINES_MS.
+    
+    Без декоратора GET относится к классу 'read', остальные методы - к 'write'.
+    
+    Args:
+        endpoint_class: ключ REQUEST_DEADLINES_MS (например, 'search') или 'stream'
+    """
+    def decorator(view):
+        view.deadline_class = endpoint_class
+        return view
+    return decorator
+
+
+def remaining_ms() -> Optional[int]:
+    """Оставшееся время запроса в миллисекундах (None - дедлайна нет)"""
+    deadline_at = g.get('deadline_at')
+    if deadline_at is None:
+        return None
+    return int((deadline_at - time.monotonic()) * 1000)
+
+
+@contextmanager
+def without_deadline():
+    """
+    Служебные запросы к БД без дедлайна запроса.
+    
+    Новые транзакции внутри блока не получают statement_timeout и lock_timeout
+    и выполняются даже после истечения дедлайна.
+    """
+    deadline_at = g.pop('deadline_at', None)
+    try:
+        yield
+    finally:
+        if deadline_at is not None:
+            g.deadline_at = deadline_at
+
+
+def _start_deadline() -> None:
+    view = current_app.view_functions.get(request.endpoint)
+    endpoint_class = getattr(view, 'deadline_class', None)
+    if endpoint_class is None:
+        endpoint_class = 'read' if request.method in ('GET', 'HEAD') else 'write'
+    g.deadline_class = endpoint_class
+    if endpoint_class == STREAMING:
+        return
+    
+    timeout_ms = current_app.config['REQUEST_DEADLINES_MS'][endpoint_class]
+    header = request.headers.get(DEADLINE_HEADER)
+    if header is not None:
+        try:
+            timeout_ms = int(header)
+        except ValueError:
+            raise ValidationError(f'{DEADLINE_HEADER} must be a valid integer')
+        if timeout_ms <= 0:
+            raise ValidationError(f'{DEADLINE_HEADER} must be greater than 0')
+        timeout_ms = min(timeout_ms, current_app.config['REQUEST_DEADLINE_MAX_MS'])
+    g.deadline_at = time.monotonic() + timeout_ms / 1000
+
+
+def _apply_timeouts(session, transaction, connection) -> None:
+    """
+    В начале каждой транзакции запроса передать остаток дедлайна в PostgreSQL.
+    
+    SET LOCAL действует до конца транзакции, поэтому таймауты не переходят
+    на следующие запросы через пул соединений.
+    """
+    if not has_request_context():
+        return
+    remaining = remaining_ms()
+    if remaining is None:
+        return
+    if remaining <= 0:
+        raise DeadlineExceededError()
+    if connection.dialect.name != 'postgresql':
+        return
+    lock_timeout = min(remaining, current_app.config['REQUEST_LOCK_TIMEOUT_MS'])
+    connection.exec_driver_sql(
+        f'SET LOCAL statement_timeout = {remaining}; SET LOCAL lock_timeout = {lock_timeout}'
+    )
+
+
+def register_deadlines(app: Flask):
+    """Регистрация дедлайнов запросов и таймаутов транзакций"""
+    app.before_request(_start_deadline)
+    event.listen(Session, 'after_begin', _apply_timeouts)
@@ -1,7 +1,16 @@
-from flask import jsonify
-from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from flask import g, jsonify, request
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError, OperationalError
 from werkzeug.exceptions import HTTPException
 from models import db
+import metrics
+
+
+# SQLSTATE PostgreSQL: отмена по statement_timeout и отказ по lock_timeout
+QUERY_CANCELED = '57014'
+LOCK_NOT_AVAILABLE = '55P03'
+
+# Через сколько секунд клиенту стоит повторить запрос после lock_timeout
+LOCK_RETRY_AFTER_SECONDS = 1
 
 
 class APIError(Exception):
@@ -33,6 +42,27 @@ class NotFoundError(APIError):
         super().__init__(message, status_code=404, payload=payload)
 
 
+class ConflictError(APIError):
+    """Конфликт с текущим состоянием ресурса"""
+    
+    def __init__(self, message="Request conflicts with the current state", payload=None):
+        super().__init__(message, status_code=409, payload=payload)
+
+
+class ServiceUnavailableError(APIError):
+    """Ресурс временно занят (не дождались блокировки)"""
+    
+    def __init__(self, message="Resource is busy, retry later", payload=None):
+        super().__init__(message, status_code=503, payload=payload)
+
+
+class DeadlineExceededError(APIError):
+    """Истек дедлайн запроса"""
+    
+    def __init__(self, message="Request deadline exceeded", payload=None):
+        super().__init__(message, status_code=504, payload=payload)
+
+
 class DatabaseError(APIError):
     """Ошибка базы данных"""
     
@@ -75,6 +105,45 @@ def register_error_handlers(app):
         response.status_code = error.status_code
         return response
     
+    @app.errorhandler(ConflictError)
+    def handle_conflict_error(error):
+        """Обработчик конфликтов (например, повтор Idempotency-Key)"""
+        response = jsonify({
+            'error': error.message,
+            'type': 'ConflictError'
+        })
+        response.status_code = error.status_code
+        return response
+    
+    @app.errorhandler(ServiceUnavailableError)
+    def handle_service_unavailable_error(error):
+        """Обработчик 503: блокировку не удалось получить за lock_timeout"""
+        db.session.rollback()
+        metrics.LOCK_TIMEOUTS.inc(endpoint=request.endpoint, deadline_class=g.get('deadline_class'))
+        response = jsonify({
+            'error': error.message,
+            'type': 'ServiceUnavailableError'
+        })
+        response.status_code = error.status_code
+        response.headers['Retry-After'] = str(LOCK_RETRY_AFTER_SECONDS)
+        return response
+    
+    @app.errorhandler(DeadlineExceededError)
+    def handle_deadline_exceeded_error(error):
+        """Обработчик 504: дедлайн истек до запроса к БД или по statement_timeout"""
+        db.session.rollback()
+        metrics.DEADLINE_EXCEEDED.inc(
+            endpoint=request.endpoint,
+            deadline_class=g.get('deadline_class'),
+            reason=(error.payload or {}).get('reason', 'deadline')
+        )
+        response = jsonify({
+            'error': error.message,
+            'type': 'DeadlineExceededError'
+        })
+        response.status_code = error.status_code
+        return response
+    
     @app.errorhandler(DatabaseError)
     def handle_database_error(error):
         """Обработчик ошибок базы данных"""
@@ -142,6 +211,16 @@ def register_error_handlers(app):
             'status_code': 400
         }), 400
     
+    @app.errorhandler(OperationalError)
+    def handle_operational_error(error):
+        """Таймауты PostgreSQL превращаются в 503/504, остальное - в общую ошибку БД"""
+        pgcode = getattr(error.orig, 'pgcode', None)
+        if pgcode == QUERY_CANCELED:
+            return handle_deadline_exceeded_error(DeadlineExceededError(payload={'reason': 'statement_timeout'}))
+        if pgcode == LOCK_NOT_AVAILABLE:
+            return handle_service_unavailable_error(ServiceUnavailableError())
+        return handle_sqlalchemy_error(error)
+    
     @app.errorhandler(SQLAlchemyError)
     def handle_sqlalchemy_error(error):
         """Обработчик общих ошибок SQLAlchemy"""
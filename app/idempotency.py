@@ -0,0 +1,32 @@
+from functools import wraps
+from flask import request
+from services.idempotency_service import IdempotencyService
+
+
+idempotency_service = IdempotencyService()
+
+
+def idempotent(scope: str):
+    """
+    Декоратор маршрута с поддержкой заголовка Idempotency-Key.
+    
+    Без заголовка маршрут выполняется как обычно.
+    
+    Args:
+        scope: пространство имен ключей (например, 'rentals')
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get('Idempotency-Key')
+            if key is None:
+                return view(*args, **kwargs)
+            
+            request_hash = idempotency_service.request_hash(
+                request.method, request.path, request.get_data()
+            )
+            return idempotency_service.execute(
+                scope, key, request_hash, lambda: view(*args, **kwargs)
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,95 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Sequence, Tuple
+from flask import Flask, request
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Counter:
+    """Счетчик с метками в памяти процесса (экспортируется в текстовом формате Prometheus)"""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = defaultdict(float)
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] += amount
+    
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+    
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            samples = sorted(self._values.items())
+        for key, value in samples:
+            labels = ','.join(f'{name}="{_escape(label)}"' for name, label in zip(self.labelnames, key))
+            lines.append(f'{self.name}{{{labels}}} {value:g}' if labels else f'{self.name} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+
+class Registry:
+    """Набор счетчиков процесса"""
+    
+    def __init__(self):
+        self._counters: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        with self._lock:
+            if name not in self._counters:
+                self._counters[name] = Counter(name, documentation, labelnames)
+            return self._counters[name]
+    
+    def render(self) -> str:
+        with self._lock:
+            counters = list(self._counters.values())
+        return ''.join(counter.render() for counter in counters)
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter(
+    'energy_api_requests_total',
+    'HTTP requests by endpoint and status',
+    ('endpoint', 'method', 'status')
+)
+DEADLINE_EXCEEDED = REGISTRY.counter(
+    'energy_api_deadline_exceeded_total',
+    'Requests stopped by their deadline (reason: deadline before a query, statement_timeout in PostgreSQL)',
+    ('endpoint', 'deadline_class', 'reason')
+)
+LOCK_TIMEOUTS = REGISTRY.counter(
+    'energy_api_lock_timeout_total',
+    'Requests that failed waiting for a row or table lock (lock_timeout)',
+    ('endpoint', 'deadline_class')
+)
+STATEMENT_EXECUTIONS = REGISTRY.counter(
+    'energy_api_statement_executions_total',
+    'Repository statement executions (mode=compiled: SQLAlchemy compiled cache, '
+    'mode=prepared: statement already prepared on the connection)',
+    ('statement', 'mode', 'cache')
+)
+
+
+def register_metrics(app: Flask):
+    """Подсчет запросов по эндпоинтам"""
+    
+    @app.after_request
+    def count_request(response):
+        REQUESTS.inc(
+            endpoint=request.endpoint or 'unknown',
+            method=request.method,
+            status=response.status_code
+        )
+        return response
@@ -1,11 +1,38 @@
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable
 from flask_sqlalchemy import SQLAlchemy
 
 
 db = SQLAlchemy()
 
 
-class Company(db.Model):
+class SparseFieldsMixin:
+    """Сериализация только запрошенных колонок (?fields=)"""
+    
+    @classmethod
+    def column_names(cls):
+        return [column.key for column in cls.__table__.columns]
+    
+    @classmethod
+    def foreign_key_names(cls):
+        return [column.key for column in cls.__table__.columns if column.foreign_keys]
+    
+    def to_sparse_dict(self, fields: Iterable[str]) -> dict:
+        # Обращаемся только к запрошенным атрибутам, чтобы не догружать
+        # колонки, отложенные load_only
+        data = {}
+        for name in fields:
+            value = getattr(self, name)
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = float(value)
+            data[name] = value
+        return data
+
+
+class Company(SparseFieldsMixin, db.Model):
     """Модель компании-поставщика энергии"""
     __tablename__ = 'companies'
     
@@ -27,7 +54,7 @@ class Company(db.Model):
         }
 
 
-class EnergySupplyPoint(db.Model):
+class EnergySupplyPoint(SparseFieldsMixin, db.Model):
     """Модель точки поставки электроэнергии"""
     __tablename__ = 'energy_supply_points'
     
@@ -51,10 +78,12 @@ class EnergySupplyPoint(db.Model):
         }
 
 
-class CompanyClient(db.Model):
+class CompanyClient(SparseFieldsMixin, db.Model):
     """Модель клиента компании"""
     __tablename__ = 'company_clients'
     
+    # В PostgreSQL первичный ключ (id, energy_supply_point_id) - таблица секционирована по точке;
+    # id уникален за счет последовательности, поэтому ORM идентифицирует строку по нему
     id = db.Column(db.Integer, primary_key=True)
     energy_supply_point_id = db.Column(db.Integer, db.ForeignKey('energy_supply_points.id'), nullable=False)
     company_name = db.Column(db.String(255), nullable=False)
@@ -69,3 +98,83 @@ class CompanyClient(db.Model):
             'quantity_power': float(self.quantity_power) if self.quantity_power else None,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+
+class ChangeEvent(db.Model):
+    """Событие журнала изменений (заполняется триггерами notify_change)"""
+    __tablename__ = 'change_events'
+    
+    id = db.Column(db.BigInteger, primary_key=True)
+    # Транзакция, записавшая событие (pg_current_xact_id); вместе с id - курсор ленты
+    txid = db.Column(db.BigInteger, nullable=False, default=0)
+    table_name = db.Column(db.String(64), nullable=False)
+    operation = db.Column(db.String(8), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'txid': self.txid,
+            'cursor': f'{self.txid}-{self.id}',
+            'table': self.table_name,
+            'operation': self.operation,
+            'row_id': self.row_id,
+            'data': self.data,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class IdempotencyKey(db.Model):
+    """Сохраненный результат запроса с заголовком Idempotency-Key"""
+    __tablename__ = 'idempotency_keys'
+    
+    key = db.Column(db.String(255), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.SmallInteger)
+    response_body = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    # Аренда выполняющегося запроса: после нее ключ может занять повтор
+    locked_until = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    @property
+    def is_completed(self) -> bool:
+        return self.status_code is not None
+    
+    @property
+    def is_abandoned(self) -> bool:
+        """Запрос не завершился за время аренды (процесс упал между захватом и сохранением)"""
+        return not self.is_completed and self.locked_until <= datetime.utcnow()
+
+
+class CapacityLedgerCheckpoint(db.Model):
+    """Последняя запись журнала аренд воркера, сохраненная в company_clients"""
+    __tablename__ = 'capacity_ledger_checkpoints'
+    
+    worker_index = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    last_seq = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class Job(db.Model):
+    """Фоновая задача (очередь в таблице jobs, выборка через SKIP LOCKED)"""
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    kind = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(16), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False)
+    progress_done = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(128))
+    locked_until = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
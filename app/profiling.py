@@ -0,0 +1,269 @@
+import cProfile
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from functools import wraps
+from typing import Iterable, Optional
+from flask import Blueprint, Flask, Response, current_app, g, jsonify, request
+from error_handlers import APIError, ValidationError, NotFoundError
+from models import db
+from services.pg_listener import PgListener
+
+
+logger = logging.getLogger(__name__)
+
+DEBUG_CHANNEL = 'energy_debug'
+PROFILE_MODES = ('pstats', 'collapsed')
+PROFILE_SORT_KEYS = tuple(key.value for key in pstats.SortKey)
+
+
+class StackSampler:
+    """
+    Сэмплирующий профилировщик: периодически снимает стеки потоков
+    (sys._current_frames) и считает одинаковые стеки в collapsed-формате.
+    """
+    
+    def __init__(self, interval: float, thread_ids: Optional[Iterable[int]] = None):
+        self.interval = interval
+        self.thread_ids = set(thread_ids) if thread_ids else None
+        self.counts = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+    
+    def start(self) -> 'StackSampler':
+        self._thread.start()
+        return self
+    
+    def stop(self) -> 'StackSampler':
+        self._stopped.set()
+        self._thread.join()
+        return self
+    
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.counts[';'.join(reversed(stack))] += 1
+    
+    def collapsed(self) -> str:
+        """Стеки в формате flamegraph.pl / speedscope: 'a;b;c <count>'"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.counts.most_common())
+
+
+def _check_token() -> None:
+    token = current_app.config['PROFILING_TOKEN']
+    provided = request.headers.get('X-Debug-Token', '')
+    if not hmac.compare_digest(provided.encode(), token.encode()):
+        raise APIError('Invalid or missing X-Debug-Token', status_code=403)
+
+
+def require_debug_token(view):
+    """Декоратор: доступ только с заголовком X-Debug-Token"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        _check_token()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def _profile_dir(app: Flask) -> str:
+    directory = app.config['PROFILE_OUTPUT_DIR']
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _prune_profiles(app: Flask, directory: str) -> None:
+    """Удалить файлы профилей старше PROFILE_RETENTION_HOURS и сверх PROFILE_MAX_FILES"""
+    expires_at = time.time() - app.config['PROFILE_RETENTION_HOURS'] * 3600
+    files = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            files.append((os.path.getmtime(path), path))
+        except FileNotFoundError:
+            continue
+    files.sort(reverse=True)
+    
+    for index, (modified_at, path) in enumerate(files):
+        if index >= app.config['PROFILE_MAX_FILES'] or modified_at < expires_at:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Файл уже удалил другой процесс
+                pass
+
+
+def _run_sampling(app: Flask, profile_id: str, seconds: float, interval: float) -> None:
+    """Сэмплировать все потоки процесса и записать стеки в PROFILE_OUTPUT_DIR"""
+    sampler = StackSampler(interval).start()
+    time.sleep(seconds)
+    sampler.stop()
+    
+    directory = _profile_dir(app)
+    path = os.path.join(directory, f'{profile_id}-{os.getpid()}.collapsed')
+    with open(path, 'w') as file:
+        file.write(sampler.collapsed())
+    logger.info('Sampling profile %s written to %s', profile_id, path)
+    _prune_profiles(app, directory)
+
+
+def _start_sampling(app: Flask, payload: str) -> None:
+    try:
+        command = json.loads(payload)
+        profile_id = command['id']
+        seconds = float(command['seconds'])
+        interval = float(command['interval'])
+    except (ValueError, KeyError, TypeError):
+        logger.warning('Malformed profiling command: %r', payload)
+        return
+    threading.Thread(
+        target=_run_sampling, args=(app, profile_id, seconds, interval),
+        name=f'profile-{profile_id}', daemon=True
+    ).start()
+
+
+debug_bp = Blueprint('debug', __name__)
+
+
+@debug_bp.route('/profile/sample', methods=['POST'])
+@require_debug_token
+def start_sampling_profile():
+    """Запустить сэмплирующий профилировщик во всех процессах на заданное время"""
+    max_seconds = current_app.config['PROFILE_MAX_SECONDS']
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval = float(request.args.get('interval_ms', current_app.config['PROFILE_SAMPLE_INTERVAL_MS'])) / 1000
+    except ValueError:
+        raise ValidationError('seconds and interval_ms must be valid numbers')
+    if not 0 < seconds <= max_seconds:
+        raise ValidationError(f'seconds must be between 0 and {max_seconds}')
+    if interval <= 0:
+        raise ValidationError('interval_ms must be greater than 0')
+    
+    profile_id = uuid.uuid4().hex
+    command = json.dumps({'id': profile_id, 'seconds': seconds, 'interval': interval})
+    
+    if db.engine.dialect.name == 'postgresql':
+        # Команду получат слушатели всех процессов, включая текущий
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql('SELECT pg_notify(%s, %s)', (DEBUG_CHANNEL, command))
+            connection.commit()
+    else:
+        _start_sampling(current_app._get_current_object(), command)
+    
+    return jsonify({
+        'profile_id': profile_id,
+        'seconds': seconds,
+        'result': f'/api/debug/profile/sample/{profile_id}'
+    }), 202
+
+
+@debug_bp.route('/profile/sample/<profile_id>', methods=['GET'])
+@require_debug_token
+def get_sampling_profile(profile_id):
+    """Объединенные стеки всех процессов, записавших профиль (collapsed-формат)"""
+    if not profile_id.isalnum():
+        raise ValidationError('Invalid profile id')
+    
+    directory = _profile_dir(current_app)
+    files = [name for name in os.listdir(directory) if name.startswith(f'{profile_id}-')]
+    if not files:
+        raise NotFoundError(f'Profile {profile_id} not found or not finished yet')
+    
+    counts = Counter()
+    for name in files:
+        with open(os.path.join(directory, name)) as file:
+            for line in file:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                counts[stack] += int(count)
+    
+    body = ''.join(f'{stack} {count}\n' for stack, count in counts.most_common())
+    return Response(body, mimetype='text/plain', headers={'X-Profile-Processes': str(len(files))})
+
+
+def register_profiling(app: Flask):
+    """
+    Регистрация отладочного профилирования.
+    
+    Включается только при заданном PROFILING_TOKEN; иначе никакие хуки
+    не регистрируются и накладных расходов нет.
+    """
+    if not app.config.get('PROFILING_TOKEN'):
+        return
+    
+    app.register_blueprint(debug_bp, url_prefix='/api/debug')
+    
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+        listener = PgListener(DEBUG_CHANNEL, on_notify=lambda payload: _start_sampling(app, payload))
+        # Не в CLI и не в родительском процессе перезагрузчика
+        app.before_request(lambda: listener.ensure_started(app))
+    
+    @app.before_request
+    def start_request_profile():
+        mode = request.headers.get('X-Profile')
+        if not mode:
+            return
+        _check_token()
+        if mode not in PROFILE_MODES:
+            raise ValidationError(f'X-Profile must be one of: {", ".join(PROFILE_MODES)}')
+        
+        if mode == 'pstats':
+            g.profile_sort = request.headers.get('X-Profile-Sort', 'cumulative')
+            if g.profile_sort not in PROFILE_SORT_KEYS:
+                raise ValidationError(f'X-Profile-Sort must be one of: {", ".join(PROFILE_SORT_KEYS)}')
+            try:
+                g.profile_limit = int(request.headers.get('X-Profile-Limit', 50))
+            except ValueError:
+                raise ValidationError('X-Profile-Limit must be a valid integer')
+            if g.profile_limit <= 0:
+                raise ValidationError('X-Profile-Limit must be greater than 0')
+            
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+        else:
+            interval = app.config['PROFILE_SAMPLE_INTERVAL_MS'] / 1000
+            g.profiler = StackSampler(interval, [threading.get_ident()]).start()
+        g.profile_mode = mode
+    
+    @app.after_request
+    def finish_request_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        
+        if g.profile_mode == 'pstats':
+            profiler.disable()
+            output = io.StringIO()
+            stats = pstats.Stats(profiler, stream=output)
+            stats.sort_stats(g.profile_sort)
+            stats.print_stats(g.profile_limit)
+            body = output.getvalue()
+        else:
+            body = profiler.stop().collapsed()
+        
+        # Ответ подменяется отчетом; исходный статус сохраняется в заголовке
+        return Response(
+            body, mimetype='text/plain',
+            headers={'X-Profiled-Status': str(response.status_code)}
+        )
@@ -1,10 +1,20 @@
 from repositories.company_repository import CompanyRepository
 from repositories.energy_supply_point_repository import EnergySupplyPointRepository
 from repositories.company_client_repository import CompanyClientRepository
+from repositories.idempotency_key_repository import IdempotencyKeyRepository
+from repositories.export_repository import ExportRepository
+from repositories.change_event_repository import ChangeEventRepository
+from repositories.capacity_ledger_repository import CapacityLedgerRepository
+from repositories.job_repository import JobRepository
 
 
 __all__ = [
     'CompanyRepository',
     'EnergySupplyPointRepository',
-    'CompanyClientRepository'
+    'CompanyClientRepository',
+    'IdempotencyKeyRepository',
+    'ExportRepository',
+    'ChangeEventRepository',
+    'CapacityLedgerRepository',
+    'JobRepository'
 ]
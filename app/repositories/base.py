@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, TypeVar, Generic, Type
+from typing import List, Optional, TypeVar, Generic, Type, Dict, Sequence
 from models import db
+from sqlalchemy import inspect
+from sqlalchemy.orm import selectinload, load_only
 
 T = TypeVar('T')
 
@@ -10,12 +12,14 @@ class BaseRepository(ABC, Generic[T]):
     def __init__(self, model_class: Type[T]):
         self.model_class = model_class
     
-    def get_all(self) -> List[T]:
+    def get_all(self, options: Sequence = ()) -> List[T]:
         """Получить все записи"""
-        return self.model_class.query.all()
+        return self.model_class.query.options(*options).all()
     
-    def get_by_id(self, entity_id: int) -> Optional[T]:
+    def get_by_id(self, entity_id: int, options: Sequence = ()) -> Optional[T]:
         """Получить запись по ID"""
+        if options:
+            return db.session.get(self.model_class, entity_id, options=list(options))
         return self.model_class.query.get(entity_id)
     
     def add(self, entity: T) -> T:
@@ -29,6 +33,57 @@ class BaseRepository(ABC, Generic[T]):
         db.session.delete(entity)
         db.session.commit()
     
+    def loader_options(self, includes: Sequence[str], fields: Dict[str, List[str]]) -> list:
+        """
+        Опции загрузки для ?include= и ?fields=.
+        
+        Каждая связь догружается одним запросом selectinload, из таблиц
+        выбираются только запрошенные колонки (плюс ключи, нужные для связей).
+        """
+        options = []
+        if fields.get(''):
+            options.append(load_only(*self._load_columns(self.model_class, fields[''])))
+        
+        for path in includes:
+            loader = None
+            model = self.model_class
+            prefix = []
+            for name in path.split('.'):
+                attribute = getattr(model, name)
+                loader = selectinload(attribute) if loader is None else loader.selectinload(attribute)
+                model = inspect(model).relationships[name].mapper.class_
+                prefix.append(name)
+                nested_fields = fields.get('.'.join(prefix))
+                if nested_fields:
+                    loader = loader.load_only(*self._load_columns(model, nested_fields))
+            options.append(loader)
+        return options
+    
+    @staticmethod
+    def _load_columns(model, names: Sequence[str]) -> list:
+        # Первичный и внешние ключи нужны SQLAlchemy для сборки связей
+        required = set(names) | {'id'} | set(model.foreign_key_names())
+        return [getattr(model, name) for name in model.column_names() if name in required]
+    
+    def to_sparse_dict(self, entity: T, includes: Sequence[str], fields: Dict[str, List[str]], path: str = '') -> dict:
+        """Сериализовать сущность с учетом ?fields= и вложенных ?include="""
+        names = fields.get(path) or entity.column_names()
+        if 'id' not in names:
+            names = ['id'] + list(names)
+        data = entity.to_sparse_dict(names)
+        
+        depth = path.count('.') + 1 if path else 0
+        for include in includes:
+            parts = include.split('.')
+            if len(parts) != depth + 1 or (path and not include.startswith(path + '.')):
+                continue
+            value = getattr(entity, parts[-1])
+            if isinstance(value, list):
+                data[parts[-1]] = [self.to_sparse_dict(item, includes, fields, include) for item in value]
+            else:
+                data[parts[-1]] = self.to_sparse_dict(value, includes, fields, include) if value else None
+        return data
+    
     @abstractmethod
     def to_dict(self, entity: T) -> dict:
         """Преобразовать сущность в словарь"""
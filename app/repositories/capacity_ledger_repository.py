@@ -0,0 +1,83 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+from models import db, CapacityLedgerCheckpoint, EnergySupplyPoint, CompanyClient
+from repositories.base import BaseRepository
+from sqlalchemy import select, func, insert
+
+
+class CapacityLedgerRepository(BaseRepository[CapacityLedgerCheckpoint]):
+    """Репозиторий журнала аренд горячих точек поставки"""
+    
+    def __init__(self):
+        super().__init__(CapacityLedgerCheckpoint)
+    
+    def get_last_seq(self, worker_index: int) -> int:
+        """Номер последней записи воркера, уже сохраненной в company_clients"""
+        last_seq = db.session.execute(
+            select(CapacityLedgerCheckpoint.last_seq)
+            .where(CapacityLedgerCheckpoint.worker_index == worker_index)
+        ).scalar()
+        db.session.commit()
+        return last_seq or 0
+    
+    def get_capacities(self, point_ids: Iterable[int]) -> Dict[int, Tuple[Decimal, Decimal]]:
+        """Максимальная и уже арендованная мощность точек одним запросом"""
+        used_power = (
+            select(func.coalesce(func.sum(CompanyClient.quantity_power), 0))
+            .where(CompanyClient.energy_supply_point_id == EnergySupplyPoint.id)
+            .scalar_subquery()
+        )
+        rows = db.session.execute(
+            select(EnergySupplyPoint.id, EnergySupplyPoint.max_power_kw, used_power)
+            .where(EnergySupplyPoint.id.in_(list(point_ids)))
+        ).all()
+        db.session.commit()
+        return {point_id: (Decimal(max_power), Decimal(used)) for point_id, max_power, used in rows}
+    
+    def save_entries(self, worker_index: int, entries: List[dict]) -> int:
+        """
+        Перенести записи журнала в company_clients одной транзакцией.
+        
+        Контрольная точка воркера блокируется и сдвигается в той же транзакции,
+        поэтому повторный перенос после сбоя не создает дубликатов. Записи
+        удаленных точек пропускаются. Возвращает число пропущенных записей.
+        """
+        checkpoint = db.session.get(
+            CapacityLedgerCheckpoint, worker_index,
+            with_for_update=True, populate_existing=True
+        )
+        if checkpoint is None:
+            checkpoint = CapacityLedgerCheckpoint(worker_index=worker_index, last_seq=0)
+            db.session.add(checkpoint)
+        
+        new_entries = [entry for entry in entries if entry['seq'] > checkpoint.last_seq]
+        point_ids = {entry['point_id'] for entry in new_entries}
+        existing_ids = set(db.session.execute(
+            select(EnergySupplyPoint.id).where(EnergySupplyPoint.id.in_(point_ids))
+        ).scalars()) if point_ids else set()
+        
+        rows = [
+            {
+                'energy_supply_point_id': entry['point_id'],
+                'company_name': entry['company_name'],
+                'quantity_power': Decimal(entry['quantity_power']),
+                'created_at': datetime.fromisoformat(entry['created_at'])
+            }
+            for entry in new_entries
+            if entry['point_id'] in existing_ids
+        ]
+        if rows:
+            db.session.execute(insert(CompanyClient), rows)
+        
+        checkpoint.last_seq = max(checkpoint.last_seq, entries[-1]['seq'])
+        checkpoint.updated_at = datetime.utcnow()
+        db.session.commit()
+        return len(new_entries) - len(rows)
+    
+    def to_dict(self, checkpoint: CapacityLedgerCheckpoint) -> dict:
+        return {
+            'worker_index': checkpoint.worker_index,
+            'last_seq': checkpoint.last_seq,
+            'updated_at': checkpoint.updated_at.isoformat() if checkpoint.updated_at else None
+        }
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from models import db, ChangeEvent
+from repositories.base import BaseRepository
+from sqlalchemy import delete, literal_column, tuple_
+
+
+# Все транзакции с txid меньше xmin текущего снимка уже завершены
+_COMMITTED_HORIZON = literal_column('pg_snapshot_xmin(pg_current_snapshot())::text::bigint')
+
+
+class ChangeEventRepository(BaseRepository[ChangeEvent]):
+    """Репозиторий журнала изменений"""
+    
+    def __init__(self):
+        super().__init__(ChangeEvent)
+    
+    def _committed(self):
+        """
+        События завершенных транзакций в порядке курсора (txid, id).
+        
+        id выдается при вставке, а транзакции фиксируются в другом порядке, поэтому
+        по одному id событие меньшей незавершенной транзакции можно пропустить.
+        События отдаются только до горизонта xmin: все транзакции с меньшим txid
+        завершены, и новые события позже не появятся перед уже прочитанными.
+        """
+        query = ChangeEvent.query
+        if db.engine.dialect.name == 'postgresql':
+            query = query.filter(ChangeEvent.txid < _COMMITTED_HORIZON)
+        return query
+    
+    def get_after(self, position: Tuple[int, int], limit: int) -> List[ChangeEvent]:
+        """Получить события после курсора (txid, id)"""
+        return (
+            self._committed()
+            .filter(tuple_(ChangeEvent.txid, ChangeEvent.id) > tuple_(*position))
+            .order_by(ChangeEvent.txid, ChangeEvent.id)
+            .limit(limit)
+            .all()
+        )
+    
+    def get_first_position(self) -> Optional[Tuple[int, int]]:
+        """Курсор самого старого сохраненного события"""
+        row = (
+            db.session.query(ChangeEvent.txid, ChangeEvent.id)
+            .order_by(ChangeEvent.txid, ChangeEvent.id)
+            .first()
+        )
+        return tuple(row) if row else None
+    
+    def get_last_position(self) -> Tuple[int, int]:
+        """Курсор последнего события завершенных транзакций ((0, 0) - журнал пуст)"""
+        event = self._committed().order_by(ChangeEvent.txid.desc(), ChangeEvent.id.desc()).first()
+        return (event.txid, event.id) if event else (0, 0)
+    
+    def purge_older_than(self, hours: int) -> int:
+        """Удалить события старше срока хранения"""
+        result = db.session.execute(
+            delete(ChangeEvent)
+            .where(ChangeEvent.created_at < datetime.utcnow() - timedelta(hours=hours))
+        )
+        db.session.commit()
+        return result.rowcount
+    
+    def to_dict(self, event: ChangeEvent) -> dict:
+        return event.to_dict()
@@ -1,6 +1,100 @@
-from typing import Optional
-from models import db, CompanyClient
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Tuple
+from models import db, CompanyClient, EnergySupplyPoint
 from repositories.base import BaseRepository
+from repositories.statements import Statement
+from sqlalchemy import delete, func, select, text
+
+
+# Условия отбора клиентов по нормализованному (lower) имени для каждого режима поиска
+_CUSTOMER_CONDITIONS = {
+    'exact': "lower(cc.company_name) = :name",
+    'prefix': "lower(cc.company_name) LIKE :pattern ESCAPE '\\'",
+    'fuzzy': "lower(cc.company_name) % :name"
+}
+
+# Страница клиентов считается без аренд; аренды каждого клиента страницы
+# выбираются отдельно (LATERAL) и не больше :rentals_limit
+_CUSTOMER_RENTALS_SQL = """
+    WITH customers AS (
+        SELECT
+            cc.company_name,
+            COUNT(*) AS rentals_count,
+            SUM(cc.quantity_power) AS total_power_kw,
+            MAX(similarity(lower(cc.company_name), :name)) AS similarity,
+            COUNT(*) OVER () AS total_customers
+        FROM company_clients cc
+        WHERE {condition}
+        GROUP BY cc.company_name
+        ORDER BY similarity DESC, cc.company_name
+        LIMIT :limit OFFSET :offset
+    )
+    SELECT
+        c.company_name,
+        c.rentals_count,
+        c.total_power_kw,
+        c.similarity,
+        r.rentals,
+        c.total_customers
+    FROM customers c
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(json_agg(json_build_object(
+            'id', first.id,
+            'energy_supply_point_id', first.energy_supply_point_id,
+            'energy_supply_point_name', esp.name,
+            'quantity_power', first.quantity_power,
+            'created_at', first.created_at
+        ) ORDER BY first.created_at, first.id), '[]') AS rentals
+        FROM (
+            SELECT cc.id, cc.energy_supply_point_id, cc.quantity_power, cc.created_at
+            FROM company_clients cc
+            WHERE lower(cc.company_name) = lower(c.company_name) AND cc.company_name = c.company_name
+            ORDER BY cc.created_at, cc.id
+            LIMIT :rentals_limit
+        ) first
+        JOIN energy_supply_points esp ON esp.id = first.energy_supply_point_id
+    ) r
+    ORDER BY c.similarity DESC, c.company_name
+"""
+
+CUSTOMER_RENTALS_QUERIES = {
+    match: Statement(f'customer_rentals_{match}', text(_CUSTOMER_RENTALS_SQL.format(condition=condition)))
+    for match, condition in _CUSTOMER_CONDITIONS.items()
+}
+
+CUSTOMER_COUNT_QUERIES = {
+    match: Statement(
+        f'customer_count_{match}',
+        text(f'SELECT COUNT(DISTINCT cc.company_name) FROM company_clients cc WHERE {condition}')
+    )
+    for match, condition in _CUSTOMER_CONDITIONS.items()
+}
+
+SET_SIMILARITY_THRESHOLD = Statement(
+    'set_similarity_threshold',
+    text("SELECT set_config('pg_trgm.similarity_threshold', :threshold, true)")
+)
+
+
+def _like_prefix(value: str) -> str:
+    escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + '%'
+
+
+def _glob_any_case(value: str) -> str:
+    """
+    Шаблон GLOB для SQLite, совпадающий без учета регистра: 'кл' -> '[Кк][Лл]'.
+    
+    LIKE и lower() в SQLite не учитывают регистр только для ASCII.
+    """
+    parts = []
+    for char in value:
+        variants = sorted({variant for variant in (char, char.lower(), char.upper()) if len(variant) == 1})
+        if len(variants) > 1 or char in '*?[':
+            parts.append(f'[{"".join(variants)}]')
+        else:
+            parts.append(char)
+    return ''.join(parts)
 
 
 class CompanyClientRepository(BaseRepository[CompanyClient]):
@@ -10,12 +104,131 @@ class CompanyClientRepository(BaseRepository[CompanyClient]):
         super().__init__(CompanyClient)
     
     def delete_by_id(self, client_id: int) -> bool:
-        """Удалить клиента по ID"""
+        """
+        Удалить клиента по ID.
+        
+        DELETE по полному ключу (id, energy_supply_point_id) затрагивает одну секцию
+        company_clients, а не индексы всех секций.
+        """
         client = self.get_by_id(client_id)
         if not client:
             return False
-        self.delete(client)
+        db.session.execute(
+            delete(CompanyClient).where(
+                CompanyClient.id == client.id,
+                CompanyClient.energy_supply_point_id == client.energy_supply_point_id
+            ),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.expunge(client)
+        db.session.commit()
         return True
     
+    def search_by_customer(self, name: str, match: str, limit: int, offset: int, rentals_limit: int,
+                           min_similarity: float) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Аренды клиентов, подходящих под имя, сгруппированные по клиенту.
+        
+        На PostgreSQL - один запрос по индексам на lower(company_name): страница клиентов
+        с общим числом аренд и мощностью, общее число клиентов - COUNT(*) OVER (),
+        первые rentals_limit аренд каждого клиента собираются json_agg.
+        Возвращает (число найденных клиентов, страница групп).
+        """
+        name = name.lower()
+        if db.engine.dialect.name != 'postgresql':
+            return self._search_by_customer_orm(name, match, limit, offset, rentals_limit, min_similarity)
+        
+        if match == 'fuzzy':
+            # Порог оператора % задается на транзакцию
+            SET_SIMILARITY_THRESHOLD.execute({'threshold': str(min_similarity)})
+        rows = CUSTOMER_RENTALS_QUERIES[match].execute({
+            'name': name,
+            'pattern': _like_prefix(name),
+            'limit': limit,
+            'offset': offset,
+            'rentals_limit': rentals_limit
+        }).mappings().all()
+        
+        if not rows:
+            # Страница за последней: общее число узнаем отдельным запросом
+            total = self._count_customers(name, match) if offset else 0
+            return total, []
+        return rows[0]['total_customers'], [dict(row) for row in rows]
+    
+    def _count_customers(self, name: str, match: str) -> int:
+        return CUSTOMER_COUNT_QUERIES[match].execute({'name': name, 'pattern': _like_prefix(name)}).scalar()
+    
+    def _search_by_customer_orm(self, name: str, match: str, limit: int, offset: int, rentals_limit: int,
+                                min_similarity: float) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Та же выборка для БД без pg_trgm и json_agg (SQLite).
+        
+        Клиенты группируются в БД, в Python сравниваются и ранжируются только имена.
+        Для exact и prefix имена заранее отбираются шаблоном GLOB без учета регистра.
+        Аренды читаются только для клиентов страницы, не больше rentals_limit на клиента.
+        """
+        query = (
+            select(CompanyClient.company_name, func.count(), func.sum(CompanyClient.quantity_power))
+            .group_by(CompanyClient.company_name)
+        )
+        if match != 'fuzzy':
+            pattern = _glob_any_case(name) + ('*' if match == 'prefix' else '')
+            query = query.where(CompanyClient.company_name.op('GLOB')(pattern))
+        
+        groups = []
+        for company_name, rentals_count, total_power in db.session.execute(query):
+            normalized_name = company_name.lower()
+            similarity = SequenceMatcher(None, normalized_name, name).ratio()
+            if match == 'exact' and normalized_name != name:
+                continue
+            if match == 'prefix' and not normalized_name.startswith(name):
+                continue
+            if match == 'fuzzy' and similarity < min_similarity:
+                continue
+            groups.append({
+                'company_name': company_name,
+                'rentals_count': rentals_count,
+                'total_power_kw': total_power,
+                'similarity': similarity,
+                'rentals': []
+            })
+        
+        groups.sort(key=lambda group: (-group['similarity'], group['company_name']))
+        page = groups[offset:offset + limit]
+        if not page:
+            return len(groups), page
+        
+        ranked = (
+            select(
+                CompanyClient.id,
+                CompanyClient.company_name,
+                CompanyClient.energy_supply_point_id,
+                EnergySupplyPoint.name.label('energy_supply_point_name'),
+                CompanyClient.quantity_power,
+                CompanyClient.created_at,
+                func.row_number().over(
+                    partition_by=CompanyClient.company_name,
+                    order_by=(CompanyClient.created_at, CompanyClient.id)
+                ).label('position')
+            )
+            .join(EnergySupplyPoint, CompanyClient.energy_supply_point_id == EnergySupplyPoint.id)
+            .where(CompanyClient.company_name.in_([group['company_name'] for group in page]))
+            .subquery()
+        )
+        rentals = db.session.execute(
+            select(ranked).where(ranked.c.position <= rentals_limit).order_by(ranked.c.position)
+        ).mappings()
+        
+        by_name = {group['company_name']: group for group in page}
+        for rental in rentals:
+            by_name[rental['company_name']]['rentals'].append({
+                'id': rental['id'],
+                'energy_supply_point_id': rental['energy_supply_point_id'],
+                'energy_supply_point_name': rental['energy_supply_point_name'],
+                'quantity_power': rental['quantity_power'],
+                'created_at': rental['created_at']
+            })
+        return len(groups), page
+    
     def to_dict(self, client: CompanyClient) -> dict:
         return client.to_dict()
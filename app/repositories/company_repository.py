@@ -1,8 +1,10 @@
-from datetime import datetime
-from typing import Optional, Dict, Any
-from models import db, Company
+from datetime import date
+from typing import List, Optional, Dict, Any, Tuple
+from models import db, Company, EnergySupplyPoint, CompanyClient
 from repositories.base import BaseRepository
-from sqlalchemy import text
+from sqlalchemy import select, delete, func, tuple_
+from repositories.stored_functions import get_stored_functions
+from schemas import CompanyStatisticsOut
 
 
 class CompanyRepository(BaseRepository[Company]):
@@ -11,11 +13,11 @@ class CompanyRepository(BaseRepository[Company]):
     def __init__(self):
         super().__init__(Company)
     
-    def create(self, name: str, registration_date: str, status: str) -> Company:
+    def create(self, name: str, registration_date: date, status: str) -> Company:
         """Создать новую компанию"""
         company = Company(
             name=name,
-            registration_date=datetime.strptime(registration_date, '%Y-%m-%d').date(),
+            registration_date=registration_date,
             status=status
         )
         return self.add(company)
@@ -25,29 +27,103 @@ class CompanyRepository(BaseRepository[Company]):
         if 'name' in data:
             company.name = data['name']
         if 'registration_date' in data:
-            company.registration_date = datetime.strptime(
-                data['registration_date'], '%Y-%m-%d'
-            ).date()
+            company.registration_date = data['registration_date']
         if 'status' in data:
             company.status = data['status']
         
         db.session.commit()
         return company
     
-    def get_statistics(self, company_id: int) -> Optional[Dict[str, Any]]:
-        """Получить статистику по компании через хранимую функцию"""
+    def count_dependents(self, company_id: int) -> Tuple[int, int]:
+        """Количество клиентов и точек поставки компании"""
+        points = db.session.execute(
+            select(func.count()).where(EnergySupplyPoint.company_id == company_id)
+        ).scalar()
+        clients = db.session.execute(
+            select(func.count())
+            .select_from(CompanyClient)
+            .join(EnergySupplyPoint, CompanyClient.energy_supply_point_id == EnergySupplyPoint.id)
+            .where(EnergySupplyPoint.company_id == company_id)
+        ).scalar()
+        return clients, points
+    
+    def delete_clients_batch(self, company_id: int, limit: int) -> int:
+        """Удалить пачку клиентов точек компании (без фиксации транзакции)"""
+        # Полный ключ (id, energy_supply_point_id) сужает удаление до секций точек компании
+        client_keys = (
+            select(CompanyClient.id, CompanyClient.energy_supply_point_id)
+            .join(EnergySupplyPoint, CompanyClient.energy_supply_point_id == EnergySupplyPoint.id)
+            .where(EnergySupplyPoint.company_id == company_id)
+            .limit(limit)
+        )
+        result = db.session.execute(
+            delete(CompanyClient).where(
+                tuple_(CompanyClient.id, CompanyClient.energy_supply_point_id).in_(client_keys)
+            ),
+            execution_options={'synchronize_session': False}
+        )
+        return result.rowcount
+    
+    def delete_points_batch(self, company_id: int, limit: int) -> int:
+        """Удалить пачку точек поставки компании (без фиксации транзакции)"""
+        point_ids = (
+            select(EnergySupplyPoint.id)
+            .where(EnergySupplyPoint.company_id == company_id)
+            .limit(limit)
+        )
         result = db.session.execute(
-            text('SELECT * FROM get_company_statistics(:company_id)'),
-            {'company_id': company_id}
+            delete(EnergySupplyPoint).where(EnergySupplyPoint.id.in_(point_ids)),
+            execution_options={'synchronize_session': False}
         )
-        row = result.fetchone()
+        return result.rowcount
+    
+    def delete_by_id(self, company_id: int) -> bool:
+        """Удалить компанию по ID (без фиксации транзакции)"""
+        result = db.session.execute(
+            delete(Company).where(Company.id == company_id),
+            execution_options={'synchronize_session': False}
+        )
+        return result.rowcount > 0
+    
+    def create_many(self, items: List[Dict[str, Any]]) -> int:
+        """
+        Создать компании с точками поставки (без фиксации транзакции).
+        
+        Даты передаются строками YYYY-MM-DD, как в сохраненной задаче импорта.
+        Возвращает количество созданных точек.
+        """
+        companies = []
+        point_count = 0
+        for item in items:
+            company = Company(
+                name=item['name'],
+                registration_date=date.fromisoformat(item['registration_date']),
+                status=item['status']
+            )
+            company.energy_supply_points = [
+                EnergySupplyPoint(
+                    name=point['name'],
+                    connection_date=date.fromisoformat(point['connection_date']),
+                    max_power_kw=point['max_power_kw']
+                )
+                for point in item['energy_supply_points']
+            ]
+            point_count += len(company.energy_supply_points)
+            companies.append(company)
+        db.session.add_all(companies)
+        db.session.flush()
+        return point_count
+    
+    def get_statistics(self, company_id: int) -> Optional[CompanyStatisticsOut]:
+        """Получить статистику по компании через хранимую функцию"""
+        row = get_stored_functions().get_company_statistics(company_id)
         
         if row:
-            return {
-                'company_id': company_id,
-                'total_supply_points': row[0],
-                'max_total_power': float(row[1]) if row[1] else 0
-            }
+            return CompanyStatisticsOut(
+                company_id=company_id,
+                total_supply_points=row[0],
+                max_total_power=float(row[1]) if row[1] else 0
+            )
         return None
     
     def to_dict(self, company: Company) -> dict:
@@ -1,8 +1,11 @@
-from datetime import datetime
-from typing import List, Optional, Dict, Any
-from models import db, EnergySupplyPoint, Company
+from datetime import date
+from typing import List, Optional, Dict, Any, Tuple
+import numpy as np
+from models import db, EnergySupplyPoint, Company, CompanyClient
 from repositories.base import BaseRepository
-from sqlalchemy import text
+from sqlalchemy import Float, cast, func, select
+from repositories.stored_functions import get_stored_functions
+from schemas import EnergySupplyPointOut
 
 
 class EnergySupplyPointRepository(BaseRepository[EnergySupplyPoint]):
@@ -11,7 +14,7 @@ class EnergySupplyPointRepository(BaseRepository[EnergySupplyPoint]):
     def __init__(self):
         super().__init__(EnergySupplyPoint)
     
-    def create(self, name: str, company_id: int, connection_date: str, max_power_kw: float) -> Optional[EnergySupplyPoint]:
+    def create(self, name: str, company_id: int, connection_date: date, max_power_kw: float) -> Optional[EnergySupplyPoint]:
         """Создать новую точку поставки"""
         # Проверка существования компании
         company = Company.query.get(company_id)
@@ -21,7 +24,7 @@ class EnergySupplyPointRepository(BaseRepository[EnergySupplyPoint]):
         point = EnergySupplyPoint(
             name=name,
             company_id=company_id,
-            connection_date=datetime.strptime(connection_date, '%Y-%m-%d').date(),
+            connection_date=connection_date,
             max_power_kw=max_power_kw
         )
         return self.add(point)
@@ -36,49 +39,35 @@ class EnergySupplyPointRepository(BaseRepository[EnergySupplyPoint]):
                 return None
             point.company_id = data['company_id']
         if 'connection_date' in data:
-            point.connection_date = datetime.strptime(
-                data['connection_date'], '%Y-%m-%d'
-            ).date()
+            point.connection_date = data['connection_date']
         if 'max_power_kw' in data:
             point.max_power_kw = data['max_power_kw']
         
         db.session.commit()
         return point
     
-    def search_by_date_range(self, date_from: Optional[str], date_to: Optional[str]) -> List[Dict[str, Any]]:
+    def search_by_date_range(self, date_from: Optional[date], date_to: Optional[date]) -> List[EnergySupplyPointOut]:
         """Поиск точек поставки по дате через хранимую функцию"""
-        result = db.session.execute(
-            text('SELECT * FROM search_energy_supply_points(:date_from, :date_to)'),
-            {'date_from': date_from, 'date_to': date_to}
-        )
+        rows = get_stored_functions().search_energy_supply_points(date_from, date_to)
         
-        points = []
-        for row in result:
-            points.append({
-                'id': row[0],
-                'name': row[1],
-                'company_id': row[2],
-                'connection_date': row[3].isoformat() if row[3] else None,
-                'max_power_kw': float(row[4]) if row[4] else None,
-                'created_at': row[5].isoformat() if row[5] else None
-            })
-        return points
+        return [
+            EnergySupplyPointOut(
+                id=row[0],
+                name=row[1],
+                company_id=row[2],
+                connection_date=row[3],
+                max_power_kw=float(row[4]) if row[4] else None,
+                created_at=row[5]
+            )
+            for row in rows
+        ]
     
     def rent_energy(self, point_id: int, company_name: str, quantity_power: float) -> Dict[str, Any]:
         """Арендовать мощность через хранимую функцию"""
-        result = db.session.execute(
-            text('SELECT * FROM rent_energy(:point_id, :company_name, :quantity_power)'),
-            {
-                'point_id': point_id,
-                'company_name': company_name,
-                'quantity_power': quantity_power
-            }
+        success, message = get_stored_functions().rent_energy(
+            point_id, company_name, quantity_power
         )
         
-        row = result.fetchone()
-        success = row[0]
-        message = row[1]
-        
         if success:
             db.session.commit()
         else:
@@ -86,5 +75,42 @@ class EnergySupplyPointRepository(BaseRepository[EnergySupplyPoint]):
         
         return {'success': success, 'message': message}
     
+    def load_capacity_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Мощность всех точек одним запросом в виде массивов NumPy.
+        
+        Возвращает (id точек, id компаний, максимальная мощность, арендованная мощность).
+        Числа приводятся к float8 в БД, чтобы драйвер не создавал Decimal на каждую строку.
+        """
+        rented = (
+            select(
+                CompanyClient.energy_supply_point_id.label('point_id'),
+                func.sum(CompanyClient.quantity_power).label('rented')
+            )
+            .group_by(CompanyClient.energy_supply_point_id)
+            .subquery()
+        )
+        rows = db.session.execute(
+            select(
+                EnergySupplyPoint.id,
+                EnergySupplyPoint.company_id,
+                cast(EnergySupplyPoint.max_power_kw, Float),
+                cast(func.coalesce(rented.c.rented, 0), Float)
+            )
+            .outerjoin(rented, rented.c.point_id == EnergySupplyPoint.id)
+            .order_by(EnergySupplyPoint.id)
+        ).all()
+        
+        if not rows:
+            empty = np.empty(0)
+            return empty.astype(np.int64), empty.astype(np.int64), empty, empty
+        point_ids, company_ids, max_power, rented_power = zip(*rows)
+        return (
+            np.array(point_ids, dtype=np.int64),
+            np.array(company_ids, dtype=np.int64),
+            np.array(max_power, dtype=np.float64),
+            np.array(rented_power, dtype=np.float64)
+        )
+    
     def to_dict(self, point: EnergySupplyPoint) -> dict:
         return point.to_dict()
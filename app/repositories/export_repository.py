@@ -0,0 +1,164 @@
+from typing import Dict, Any, Iterator, List, Sequence, BinaryIO
+from models import db
+from sqlalchemy import text
+
+
+# Описание выгружаемых таблиц: базовый FROM, колонки и допустимые присоединения.
+# Колонка - (имя, SQL-выражение, тип для Arrow/Parquet).
+EXPORT_SPECS: Dict[str, Dict[str, Any]] = {
+    'companies': {
+        'from': 'companies c',
+        'order_by': 'c.id',
+        'columns': [
+            ('id', 'c.id', 'int32'),
+            ('name', 'c.name', 'string'),
+            ('registration_date', 'c.registration_date', 'date'),
+            ('status', 'c.status', 'string'),
+            ('created_at', 'c.created_at', 'timestamp'),
+        ],
+        'includes': {
+            'rented': {
+                'joins': [
+                    'LEFT JOIN ('
+                    ' SELECT esp.company_id,'
+                    ' SUM(esp.max_power_kw) AS max_total_power,'
+                    ' SUM(COALESCE(r.rented_power, 0)) AS rented_total_power'
+                    ' FROM energy_supply_points esp'
+                    ' LEFT JOIN ('
+                    '  SELECT energy_supply_point_id, SUM(quantity_power) AS rented_power'
+                    '  FROM company_clients GROUP BY energy_supply_point_id'
+                    ' ) r ON r.energy_supply_point_id = esp.id'
+                    ' GROUP BY esp.company_id'
+                    ') cr ON cr.company_id = c.id'
+                ],
+                'columns': [
+                    ('max_total_power_kw', 'COALESCE(cr.max_total_power, 0)::NUMERIC(14, 2)', 'decimal'),
+                    ('rented_total_power_kw', 'COALESCE(cr.rented_total_power, 0)::NUMERIC(14, 2)', 'decimal'),
+                ],
+            },
+        },
+    },
+    'energy_supply_points': {
+        'from': 'energy_supply_points esp',
+        'order_by': 'esp.id',
+        'columns': [
+            ('id', 'esp.id', 'int32'),
+            ('name', 'esp.name', 'string'),
+            ('company_id', 'esp.company_id', 'int32'),
+            ('connection_date', 'esp.connection_date', 'date'),
+            ('max_power_kw', 'esp.max_power_kw', 'decimal'),
+            ('created_at', 'esp.created_at', 'timestamp'),
+        ],
+        'includes': {
+            'company': {
+                'joins': ['JOIN companies c ON c.id = esp.company_id'],
+                'columns': [
+                    ('company_name', 'c.name', 'string'),
+                    ('company_status', 'c.status', 'string'),
+                ],
+            },
+            'rented': {
+                'joins': [
+                    'LEFT JOIN ('
+                    ' SELECT energy_supply_point_id, SUM(quantity_power) AS rented_power'
+                    ' FROM company_clients GROUP BY energy_supply_point_id'
+                    ') r ON r.energy_supply_point_id = esp.id'
+                ],
+                'columns': [
+                    ('rented_power_kw', 'COALESCE(r.rented_power, 0)::NUMERIC(14, 2)', 'decimal'),
+                ],
+            },
+        },
+    },
+    'company_clients': {
+        'from': 'company_clients cc',
+        'order_by': 'cc.id',
+        'columns': [
+            ('id', 'cc.id', 'int32'),
+            ('energy_supply_point_id', 'cc.energy_supply_point_id', 'int32'),
+            ('company_name', 'cc.company_name', 'string'),
+            ('quantity_power', 'cc.quantity_power', 'decimal'),
+            ('created_at', 'cc.created_at', 'timestamp'),
+        ],
+        'includes': {
+            'company': {
+                'joins': [
+                    'JOIN energy_supply_points esp ON esp.id = cc.energy_supply_point_id',
+                    'JOIN companies c ON c.id = esp.company_id',
+                ],
+                'columns': [
+                    ('supplier_company_id', 'c.id', 'int32'),
+                    ('supplier_company_name', 'c.name', 'string'),
+                ],
+            },
+            'rented': {
+                'joins': [
+                    'JOIN energy_supply_points esp_r ON esp_r.id = cc.energy_supply_point_id',
+                    'LEFT JOIN ('
+                    ' SELECT energy_supply_point_id, SUM(quantity_power) AS rented_power'
+                    ' FROM company_clients GROUP BY energy_supply_point_id'
+                    ') r ON r.energy_supply_point_id = cc.energy_supply_point_id'
+                ],
+                'columns': [
+                    ('point_max_power_kw', 'esp_r.max_power_kw', 'decimal'),
+                    ('point_rented_power_kw', 'COALESCE(r.rented_power, 0)::NUMERIC(14, 2)', 'decimal'),
+                ],
+            },
+        },
+    },
+}
+
+
+class ExportRepository:
+    """Репозиторий потоковой выгрузки таблиц"""
+    
+    def columns(self, table: str, includes: Sequence[str]) -> List[tuple]:
+        """Колонки выгрузки с учетом присоединений"""
+        spec = EXPORT_SPECS[table]
+        columns = list(spec['columns'])
+        for name in includes:
+            columns.extend(spec['includes'][name]['columns'])
+        return columns
+    
+    def build_query(self, table: str, includes: Sequence[str], as_text: bool = False) -> str:
+        """
+        Собрать SQL выгрузки (таблица и присоединения берутся только из EXPORT_SPECS).
+        
+        as_text=True - значения приводятся к text в PostgreSQL, как их выводит COPY.
+        """
+        spec = EXPORT_SPECS[table]
+        joins = []
+        for name in includes:
+            joins.extend(spec['includes'][name]['joins'])
+        
+        select_list = ', '.join(
+            f'({expression})::text AS {name}' if as_text else f'{expression} AS {name}'
+            for name, expression, _ in self.columns(table, includes)
+        )
+        return ' '.join(
+            [f'SELECT {select_list} FROM {spec["from"]}'] + joins + [f'ORDER BY {spec["order_by"]}']
+        )
+    
+    def iter_batches(self, table: str, includes: Sequence[str], batch_size: int,
+                     as_text: bool = False) -> Iterator[List[tuple]]:
+        """
+        Читать выгрузку пачками через серверный курсор.
+        
+        В памяти одновременно находится не больше batch_size строк.
+        """
+        connection = db.session.connection().execution_options(
+            stream_results=True, max_row_buffer=batch_size
+        )
+        result = connection.execute(text(self.build_query(table, includes, as_text)))
+        try:
+            for partition in result.partitions(batch_size):
+                yield [tuple(row) for row in partition]
+        finally:
+            result.close()
+    
+    def copy_csv(self, table: str, includes: Sequence[str], output: BinaryIO) -> None:
+        """Выгрузить CSV средствами PostgreSQL (COPY ... TO STDOUT) прямо в файл"""
+        query = self.build_query(table, includes)
+        dbapi_connection = db.session.connection().connection.dbapi_connection
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)', output)
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from typing import Optional, Any
+from models import db, IdempotencyKey
+from repositories.base import BaseRepository
+from sqlalchemy import select, update, delete, or_, and_
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+class IdempotencyKeyRepository(BaseRepository[IdempotencyKey]):
+    """Репозиторий для хранения результатов идемпотентных запросов"""
+    
+    def __init__(self):
+        super().__init__(IdempotencyKey)
+    
+    def get_active(self, key: str) -> Optional[IdempotencyKey]:
+        """Получить неистекшую запись по ключу (всегда читается из БД, минуя identity map)"""
+        result = db.session.execute(
+            select(IdempotencyKey)
+            .where(IdempotencyKey.key == key, IdempotencyKey.expires_at > datetime.utcnow())
+            .execution_options(populate_existing=True)
+        )
+        record = result.scalar_one_or_none()
+        # Завершаем транзакцию чтения, чтобы не держать снапшот во время ожидания
+        db.session.commit()
+        return record
+    
+    def try_acquire(self, key: str, request_hash: str, ttl_seconds: int, lease_seconds: float) -> bool:
+        """
+        Занять ключ под выполняемый запрос на lease_seconds.
+        
+        Вставка проходит, если ключа нет, он истек или аренда незавершенного
+        запроса закончилась; при конкурентной вставке выигрывает ровно один запрос.
+        """
+        now = datetime.utcnow()
+        # INSERT ... ON CONFLICT есть в обоих диалектах (SQLite - в режиме тестов)
+        insert = sqlite.insert if db.engine.dialect.name == 'sqlite' else postgresql.insert
+        stmt = insert(IdempotencyKey).values(
+            key=key,
+            request_hash=request_hash,
+            status_code=None,
+            response_body=None,
+            created_at=now,
+            expires_at=now + timedelta(seconds=ttl_seconds),
+            locked_until=now + timedelta(seconds=lease_seconds)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.key],
+            set_={
+                'request_hash': stmt.excluded.request_hash,
+                'status_code': None,
+                'response_body': None,
+                'created_at': stmt.excluded.created_at,
+                'expires_at': stmt.excluded.expires_at,
+                'locked_until': stmt.excluded.locked_until
+            },
+            where=or_(
+                IdempotencyKey.expires_at <= now,
+                and_(IdempotencyKey.status_code.is_(None), IdempotencyKey.locked_until <= now)
+            )
+        ).returning(IdempotencyKey.key)
+        
+        acquired = db.session.execute(stmt).first() is not None
+        db.session.commit()
+        return acquired
+    
+    def complete(self, key: str, status_code: int, response_body: Any) -> None:
+        """Сохранить результат выполненного запроса"""
+        db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(status_code=status_code, response_body=response_body)
+        )
+        db.session.commit()
+    
+    def release(self, key: str) -> None:
+        """Освободить ключ незавершенного запроса, чтобы повтор выполнился заново"""
+        # Упавший запрос мог оставить транзакцию прерванной (в PostgreSQL любой
+        # следующий запрос в ней завершится ошибкой), поэтому сначала откатываем ее
+        db.session.rollback()
+        db.session.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None))
+        )
+        db.session.commit()
+    
+    def purge_expired(self) -> int:
+        """Удалить истекшие записи"""
+        result = db.session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.utcnow())
+        )
+        db.session.commit()
+        return result.rowcount
+    
+    def to_dict(self, record: IdempotencyKey) -> dict:
+        return {
+            'key': record.key,
+            'status_code': record.status_code,
+            'response_body': record.response_body,
+            'expires_at': record.expires_at.isoformat() if record.expires_at else None
+        }
@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from models import db, Job
+from repositories.base import BaseRepository
+from sqlalchemy import select, update, delete, and_, or_
+
+
+class JobRepository(BaseRepository[Job]):
+    """Репозиторий очереди фоновых задач"""
+    
+    def __init__(self):
+        super().__init__(Job)
+    
+    def enqueue(self, kind: str, payload: Dict[str, Any], max_attempts: int, total: Optional[int] = None) -> Job:
+        """Поставить задачу в очередь"""
+        job = Job(
+            kind=kind,
+            payload=payload,
+            status='queued',
+            max_attempts=max_attempts,
+            progress_total=total
+        )
+        return self.add(job)
+    
+    def get_fresh(self, job_id: int) -> Optional[Job]:
+        """Получить задачу, минуя identity map (состояние меняют воркеры)"""
+        return db.session.execute(
+            select(Job).where(Job.id == job_id).execution_options(populate_existing=True)
+        ).scalar_one_or_none()
+    
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        """
+        Забрать следующую готовую задачу.
+        
+        Подходят задачи в очереди с наступившим run_at и задачи упавших
+        воркеров с истекшей арендой. Строки, занятые другими воркерами,
+        пропускаются (FOR UPDATE SKIP LOCKED), поэтому воркеры не ждут друг друга.
+        """
+        now = datetime.utcnow()
+        job = db.session.execute(
+            select(Job)
+            .where(or_(
+                and_(Job.status == 'queued', Job.run_at <= now),
+                and_(Job.status == 'running', Job.locked_until < now)
+            ))
+            .order_by(Job.run_at, Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
+        if job is None:
+            db.session.commit()
+            return None
+        
+        # Условие на прежнее состояние защищает от двойной выборки на БД без SKIP LOCKED (SQLite)
+        result = db.session.execute(
+            update(Job)
+            .where(Job.id == job.id, Job.status == job.status, Job.attempts == job.attempts)
+            .values(
+                status='running',
+                attempts=job.attempts + 1,
+                locked_by=worker_id,
+                locked_until=now + timedelta(seconds=lease_seconds),
+                started_at=job.started_at or now,
+                error=None
+            )
+        )
+        db.session.commit()
+        if result.rowcount == 0:
+            return None
+        return job
+    
+    @staticmethod
+    def _owned(job_id: int, worker_id: str):
+        # Условие аренды: после ее истечения задачу мог забрать другой воркер
+        return and_(Job.id == job_id, Job.status == 'running', Job.locked_by == worker_id)
+    
+    def set_progress(self, job_id: int, worker_id: str, done: int, total: Optional[int], lease_seconds: float) -> bool:
+        """
+        Записать прогресс и продлить аренду; False - аренда потеряна.
+        
+        Изменение не фиксируется: обработчик коммитит его вместе с очередной
+        пачкой данных, и повтор после сбоя продолжает с сохраненного места.
+        """
+        values = {
+            'progress_done': done,
+            'locked_until': datetime.utcnow() + timedelta(seconds=lease_seconds)
+        }
+        if total is not None:
+            values['progress_total'] = total
+        result = db.session.execute(update(Job).where(self._owned(job_id, worker_id)).values(**values))
+        return result.rowcount > 0
+    
+    def complete(self, job_id: int, worker_id: str, result: Optional[Dict[str, Any]]) -> None:
+        """Отметить задачу выполненной"""
+        db.session.execute(
+            update(Job).where(self._owned(job_id, worker_id)).values(
+                status='succeeded',
+                result=result,
+                locked_by=None,
+                locked_until=None,
+                finished_at=datetime.utcnow()
+            )
+        )
+        db.session.commit()
+    
+    def fail(self, job_id: int, worker_id: str, error: str, retry_in: Optional[float]) -> None:
+        """Вернуть задачу в очередь через retry_in секунд или отметить как окончательно упавшую"""
+        now = datetime.utcnow()
+        if retry_in is None:
+            values = {'status': 'failed', 'finished_at': now}
+        else:
+            values = {'status': 'queued', 'run_at': now + timedelta(seconds=retry_in)}
+        db.session.execute(
+            update(Job).where(self._owned(job_id, worker_id)).values(
+                error=error, locked_by=None, locked_until=None, **values
+            )
+        )
+        db.session.commit()
+    
+    def purge_finished(self, hours: int) -> int:
+        """Удалить завершенные задачи старше срока хранения"""
+        result = db.session.execute(
+            delete(Job).where(Job.finished_at < datetime.utcnow() - timedelta(hours=hours))
+        )
+        db.session.commit()
+        return result.rowcount
+    
+    def to_dict(self, job: Job) -> dict:
+        return {
+            'id': job.id,
+            'kind': job.kind,
+            'status': job.status,
+            'attempts': job.attempts,
+            'max_attempts': job.max_attempts,
+            'progress_done': job.progress_done,
+            'progress_total': job.progress_total,
+            'result': job.result,
+            'error': job.error
+        }
@@ -0,0 +1,62 @@
+import re
+from typing import Any, Dict, Optional
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.engine.default import CACHE_HIT
+from models import db
+import metrics
+
+
+class Statement:
+    """
+    Запрос репозитория, созданный один раз на уровне модуля.
+    
+    Построенный объект переиспользуется, поэтому SQLAlchemy берет скомпилированный
+    SQL из кеша движка. Текстовые запросы с типами параметров в режиме
+    PREPARED_STATEMENTS выполняются через PREPARE/EXECUTE: PostgreSQL разбирает
+    запрос один раз на соединение, а после нескольких выполнений переиспользует план.
+    """
+    
+    def __init__(self, name: str, statement, param_types: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            name: имя для счетчиков и PREPARE
+            statement: text() или select()
+            param_types: типы параметров PostgreSQL в порядке позиций ($1, $2, ...);
+                без них запрос не подготавливается на сервере
+        """
+        self.name = name
+        self.statement = statement
+        self._prepare = None
+        self._execute = None
+        if param_types:
+            sql = statement.text
+            for position, param in enumerate(param_types, 1):
+                sql = re.sub(rf'(?<!:):{param}\b', f'${position}', sql)
+            self._prepare = text(f'PREPARE {name} ({", ".join(param_types.values())}) AS {sql}')
+            self._execute = text(f'EXECUTE {name} ({", ".join(":" + param for param in param_types)})')
+    
+    def execute(self, params: Optional[Dict[str, Any]] = None) -> CursorResult:
+        """Выполнить в транзакции текущей сессии"""
+        # Как и session.execute для ORM-запросов, сначала сбрасываем несохраненные объекты
+        if db.session.autoflush:
+            db.session.flush()
+        connection = db.session.connection()
+        
+        if (self._prepare is not None and current_app.config['PREPARED_STATEMENTS']
+                and connection.dialect.name == 'postgresql'):
+            # Подготовленные запросы живут до закрытия соединения и не откатываются вместе с транзакцией
+            prepared = connection.info.setdefault('prepared_statements', set())
+            cache = 'hit' if self.name in prepared else 'miss'
+            if cache == 'miss':
+                connection.execute(self._prepare)
+                prepared.add(self.name)
+            result = connection.execute(self._execute, params)
+            metrics.STATEMENT_EXECUTIONS.inc(statement=self.name, mode='prepared', cache=cache)
+            return result
+        
+        result = connection.execute(self.statement, params)
+        cache = 'hit' if result.context.cache_hit is CACHE_HIT else 'miss'
+        metrics.STATEMENT_EXECUTIONS.inc(statement=self.name, mode='compiled', cache=cache)
+        return result
@@ -0,0 +1,205 @@
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional, Tuple
+from flask import current_app
+from models import db, Company, EnergySupplyPoint, CompanyClient
+from repositories.statements import Statement
+from sqlalchemy import bindparam, select, func, text
+
+
+# Вызовы хранимых функций (db/init.sql); в режиме PREPARED_STATEMENTS - через PREPARE/EXECUTE
+GET_COMPANY_STATISTICS = Statement(
+    'get_company_statistics_call',
+    text('SELECT * FROM get_company_statistics(:company_id)'),
+    {'company_id': 'integer'}
+)
+RENT_ENERGY = Statement(
+    'rent_energy_call',
+    text('SELECT * FROM rent_energy(:point_id, :company_name, :quantity_power)'),
+    {'point_id': 'integer', 'company_name': 'varchar', 'quantity_power': 'numeric'}
+)
+SEARCH_ENERGY_SUPPLY_POINTS = Statement(
+    'search_energy_supply_points_call',
+    text('SELECT * FROM search_energy_supply_points(:date_from, :date_to)'),
+    {'date_from': 'date', 'date_to': 'date'}
+)
+
+# Те же операции на ORM для PythonFunctions
+COMPANY_STATISTICS = Statement(
+    'company_statistics',
+    select(
+        func.count(EnergySupplyPoint.id),
+        func.coalesce(func.sum(EnergySupplyPoint.max_power_kw), 0)
+    ).where(EnergySupplyPoint.company_id == bindparam('company_id'))
+)
+# Блокировка строки точки сериализует аренды одной точки (в SQLite игнорируется)
+LOCK_POINT_MAX_POWER = Statement(
+    'lock_point_max_power',
+    select(EnergySupplyPoint.max_power_kw)
+    .where(EnergySupplyPoint.id == bindparam('point_id'))
+    .with_for_update()
+)
+POINT_USED_POWER = Statement(
+    'point_used_power',
+    select(func.coalesce(func.sum(CompanyClient.quantity_power), 0))
+    .where(CompanyClient.energy_supply_point_id == bindparam('point_id'))
+)
+
+
+def _search_points_statement(by_from: bool, by_to: bool) -> Statement:
+    query = select(
+        EnergySupplyPoint.id,
+        EnergySupplyPoint.name,
+        EnergySupplyPoint.company_id,
+        EnergySupplyPoint.connection_date,
+        EnergySupplyPoint.max_power_kw,
+        EnergySupplyPoint.created_at
+    )
+    if by_from:
+        query = query.where(EnergySupplyPoint.connection_date >= bindparam('date_from'))
+    if by_to:
+        query = query.where(EnergySupplyPoint.connection_date <= bindparam('date_to'))
+    query = query.order_by(EnergySupplyPoint.connection_date, EnergySupplyPoint.id)
+    return Statement(f'search_points_{int(by_from)}{int(by_to)}', query)
+
+
+# Отдельный запрос на каждое сочетание заданных границ дат
+SEARCH_POINTS = {
+    (by_from, by_to): _search_points_statement(by_from, by_to)
+    for by_from in (False, True) for by_to in (False, True)
+}
+
+
+class PostgresFunctions:
+    """Вызов хранимых функций из db/init.sql"""
+    
+    name = 'postgres'
+    
+    def get_company_statistics(self, company_id: int) -> Optional[Tuple[int, Decimal]]:
+        row = GET_COMPANY_STATISTICS.execute({'company_id': company_id}).fetchone()
+        return (row[0], row[1]) if row else None
+    
+    def rent_energy(self, point_id: int, company_name: str, quantity_power: float) -> Tuple[bool, str]:
+        row = RENT_ENERGY.execute({
+            'point_id': point_id,
+            'company_name': company_name,
+            'quantity_power': quantity_power
+        }).fetchone()
+        return row[0], row[1]
+    
+    def search_energy_supply_points(self, date_from: Optional[date], date_to: Optional[date]) -> List[tuple]:
+        result = SEARCH_ENERGY_SUPPLY_POINTS.execute({'date_from': date_from, 'date_to': date_to})
+        return [tuple(row) for row in result]
+
+
+class PythonFunctions:
+    """
+    Реализация тех же операций на Python поверх ORM.
+    
+    Работает на любой БД, поддерживаемой SQLAlchemy (в том числе SQLite
+    в памяти), и повторяет результаты и тексты сообщений хранимых функций.
+    """
+    
+    name = 'python'
+    
+    def get_company_statistics(self, company_id: int) -> Optional[Tuple[int, Decimal]]:
+        row = COMPANY_STATISTICS.execute({'company_id': company_id}).one()
+        return row[0], Decimal(row[1])
+    
+    def rent_energy(self, point_id: int, company_name: str, quantity_power: float) -> Tuple[bool, str]:
+        max_power = LOCK_POINT_MAX_POWER.execute({'point_id': point_id}).scalar_one_or_none()
+        
+        if max_power is None:
+            return False, 'Energy supply point not found'
+        
+        used_power = POINT_USED_POWER.execute({'point_id': point_id}).scalar()
+        
+        available_power = Decimal(max_power) - Decimal(used_power)
+        # psycopg2 передает float в PostgreSQL через repr, отсюда такое же текстовое представление
+        requested_power = Decimal(repr(float(quantity_power)))
+        
+        if available_power < requested_power:
+            return False, (
+                f'Insufficient power. Available: {available_power} kW, '
+                f'Requested: {requested_power} kW'
+            )
+        
+        db.session.add(CompanyClient(
+            energy_supply_point_id=point_id,
+            company_name=company_name,
+            quantity_power=quantity_power
+        ))
+        db.session.flush()
+        return True, 'Energy rented successfully'
+    
+    def search_energy_supply_points(self, date_from: Optional[date], date_to: Optional[date]) -> List[tuple]:
+        statement = SEARCH_POINTS[(date_from is not None, date_to is not None)]
+        result = statement.execute({'date_from': date_from, 'date_to': date_to})
+        return [tuple(row) for row in result]
+
+
+BACKENDS = {
+    PostgresFunctions.name: PostgresFunctions(),
+    PythonFunctions.name: PythonFunctions(),
+}
+
+
+def get_stored_functions():
+    """
+    Реализация хранимых функций, выбранная STORED_FUNCTIONS_BACKEND.
+    
+    'auto' - хранимые функции на PostgreSQL, Python-реализация на остальных БД.
+    """
+    backend = current_app.config['STORED_FUNCTIONS_BACKEND']
+    if backend == 'auto':
+        backend = 'postgres' if db.engine.dialect.name == 'postgresql' else 'python'
+    if backend not in BACKENDS:
+        raise RuntimeError(f'Unknown STORED_FUNCTIONS_BACKEND: {backend}')
+    return BACKENDS[backend]
+
+
+def compare_backends() -> List[str]:
+    """
+    Сравнить хранимые функции и Python-реализацию на данных текущей БД PostgreSQL.
+    
+    Аренды выполняются в точке сохранения и откатываются. Возвращает список расхождений.
+    """
+    postgres, python = BACKENDS['postgres'], BACKENDS['python']
+    mismatches = []
+    
+    def check(label, call):
+        results = []
+        for backend in (postgres, python):
+            savepoint = db.session.begin_nested()
+            try:
+                results.append(call(backend))
+            finally:
+                savepoint.rollback()
+        if results[0] != results[1]:
+            mismatches.append(f'{label}: postgres={results[0]!r} python={results[1]!r}')
+    
+    company_ids = db.session.execute(select(Company.id).order_by(Company.id)).scalars().all()
+    for company_id in company_ids + [max(company_ids, default=0) + 1]:
+        check(f'get_company_statistics({company_id})',
+              lambda backend: backend.get_company_statistics(company_id))
+    
+    dates = db.session.execute(
+        select(EnergySupplyPoint.connection_date).distinct().order_by(EnergySupplyPoint.connection_date)
+    ).scalars().all()
+    ranges = [(None, None)]
+    if dates:
+        middle = dates[len(dates) // 2]
+        ranges += [(dates[0], None), (None, dates[-1]), (middle, middle), (dates[-1], dates[0])]
+    for date_from, date_to in ranges:
+        check(f'search_energy_supply_points({date_from}, {date_to})',
+              lambda backend: backend.search_energy_supply_points(date_from, date_to))
+    
+    points = db.session.execute(
+        select(EnergySupplyPoint.id, EnergySupplyPoint.max_power_kw).order_by(EnergySupplyPoint.id)
+    ).all()
+    for point_id, max_power in points + [(max((p[0] for p in points), default=0) + 1, Decimal(0))]:
+        for quantity in (0.01, float(max_power) / 2, float(max_power) + 1, 1e7):
+            check(f'rent_energy({point_id}, {quantity})',
+                  lambda backend: backend.rent_energy(point_id, 'parity-check', quantity))
+    
+    return mismatches
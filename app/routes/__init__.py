@@ -2,10 +2,20 @@ from flask import Flask
 from routes.companies import companies_bp
 from routes.energy_supply_points import energy_supply_points_bp
 from routes.company_clients import company_clients_bp
+from routes.exports import exports_bp
+from routes.changes import changes_bp
+from routes.jobs import jobs_bp
+from routes.forecasts import forecasts_bp
+from routes.metrics import metrics_bp
 
 
 def register_routes(app: Flask):
     """Регистрация всех blueprints в приложении"""
     app.register_blueprint(companies_bp, url_prefix='/api/companies')
     app.register_blueprint(energy_supply_points_bp, url_prefix='/api/energy-supply-points')
-    app.register_blueprint(company_clients_bp, url_prefix='/api/company-clients')
\ No newline at end of file
+    app.register_blueprint(company_clients_bp, url_prefix='/api/company-clients')
+    app.register_blueprint(exports_bp, url_prefix='/api/exports')
+    app.register_blueprint(changes_bp, url_prefix='/api/changes')
+    app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
+    app.register_blueprint(forecasts_bp, url_prefix='/api/forecasts')
+    app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
\ No newline at end of file
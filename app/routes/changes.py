@@ -0,0 +1,39 @@
+import json
+from flask import Blueprint, Response, request, stream_with_context
+from services.change_feed_service import ChangeFeedService, parse_cursor
+from error_handlers import ValidationError
+from deadlines import deadline
+
+
+changes_bp = Blueprint('changes', __name__)
+change_feed_service = ChangeFeedService()
+
+
+def _format_sse(event):
+    """Сериализация события в формат Server-Sent Events"""
+    if event is None:
+        return ': keepalive\n\n'
+    if event.get('reset'):
+        return f'id: {event["cursor"]}\nevent: reset\ndata: {{}}\n\n'
+    data = json.dumps(event, ensure_ascii=False, separators=(',', ':'))
+    return f'id: {event["cursor"]}\nevent: change\ndata: {data}\n\n'
+
+
+@changes_bp.route('/stream', methods=['GET'])
+@deadline('stream')
+def stream_changes():
+    """Поток изменений companies, energy_supply_points и company_clients (SSE)"""
+    # EventSource сам присылает Last-Event-ID при переподключении
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('cursor')
+    if cursor is not None:
+        try:
+            cursor = parse_cursor(cursor)
+        except ValueError:
+            raise ValidationError('cursor must be "<txid>-<id>" as sent in the event id')
+    
+    events = change_feed_service.events(cursor)
+    return Response(
+        stream_with_context(_format_sse(event) for event in events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -1,93 +1,100 @@
-from flask import Blueprint, request, jsonify
+import msgspec
+from flask import Blueprint, jsonify, request
 from services.company_service import CompanyService
-from error_handlers import ValidationError, NotFoundError
+from services.job_service import JobService
+from models import Company
+from error_handlers import NotFoundError
+from schemas import (
+    CompanyCreate, CompanyUpdate, CompanyImport,
+    decode_body, decode_sparse_args, changes, json_response
+)
+from idempotency import idempotent
+from deadlines import deadline
 
 
 companies_bp = Blueprint('companies', __name__)
 company_service = CompanyService()
+job_service = JobService()
+
+
+def _job_accepted(job):
+    """Ответ 202 со ссылкой на статус фоновой задачи"""
+    status_url = f'/api/jobs/{job.id}'
+    response = jsonify({'job_id': job.id, 'status': job.status, 'status_url': status_url})
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
 
 
 @companies_bp.route('', methods=['GET'])
 def get_companies():
-    """Получить список всех компаний"""
-    companies = company_service.get_all_companies()
-    return jsonify(companies), 200
+    """Получить список всех компаний (?include=, ?fields=)"""
+    includes, fields = decode_sparse_args(Company)
+    companies = company_service.get_all_companies(includes, fields)
+    return json_response(companies, 200)
 
 
 @companies_bp.route('/<int:company_id>', methods=['GET'])
 def get_company(company_id):
-    """Получить компанию по ID"""
-    company = company_service.get_company_by_id(company_id)
+    """Получить компанию по ID (?include=, ?fields=)"""
+    includes, fields = decode_sparse_args(Company)
+    company = company_service.get_company_by_id(company_id, includes, fields)
     
     if not company:
         raise NotFoundError(f'Company with ID {company_id} not found')
     
-    return jsonify(company), 200
+    return json_response(company, 200)
 
 
 @companies_bp.route('', methods=['POST'])
+@idempotent('companies')
 def create_company():
     """Создать новую компанию"""
-    data = request.get_json()
-    
-    if not data:
-        raise ValidationError('No data provided')
-    
-    # Валидация обязательных полей
-    required_fields = ['name', 'registration_date', 'status']
-    missing_fields = [field for field in required_fields if field not in data]
-    
-    if missing_fields:
-        raise ValidationError(
-            f'Missing required fields: {", ".join(missing_fields)}',
-            payload={'missing_fields': missing_fields}
-        )
-    
-    # Валидация статуса
-    valid_statuses = ['active', 'inactive', 'pending']
-    if data['status'] not in valid_statuses:
-        raise ValidationError(
-            f'Invalid status. Must be one of: {", ".join(valid_statuses)}',
-            payload={'valid_statuses': valid_statuses}
-        )
+    data = decode_body(CompanyCreate)
     
     company = company_service.create_company(
-        data['name'],
-        data['registration_date'],
-        data['status']
+        data.name,
+        data.registration_date,
+        data.status
     )
     
-    return jsonify(company), 201
+    return json_response(company, 201)
 
 
 @companies_bp.route('/<int:company_id>', methods=['PUT'])
 def update_company(company_id):
     """Обновить компанию"""
-    data = request.get_json()
+    data = decode_body(CompanyUpdate)
     
-    if not data:
-        raise ValidationError('No data provided')
-    
-    # Валидация статуса если он присутствует
-    if 'status' in data:
-        valid_statuses = ['active', 'inactive', 'pending']
-        if data['status'] not in valid_statuses:
-            raise ValidationError(
-                f'Invalid status. Must be one of: {", ".join(valid_statuses)}',
-                payload={'valid_statuses': valid_statuses}
-            )
-    
-    company = company_service.update_company(company_id, data)
+    company = company_service.update_company(company_id, changes(data))
     
     if not company:
         raise NotFoundError(f'Company with ID {company_id} not found')
     
-    return jsonify(company), 200
+    return json_response(company, 200)
+
+
+@companies_bp.route('/import', methods=['POST'])
+@idempotent('company_imports')
+def import_companies():
+    """Импортировать компании с точками поставки фоновой задачей"""
+    data = decode_body(CompanyImport)
+    
+    job = job_service.enqueue_company_import(msgspec.to_builtins(data.companies))
+    return _job_accepted(job)
 
 
 @companies_bp.route('/<int:company_id>', methods=['DELETE'])
 def delete_company(company_id):
-    """Удалить компанию"""
+    """Удалить компанию (с заголовком Prefer: respond-async - фоновой задачей)"""
+    if 'respond-async' in request.headers.get('Prefer', ''):
+        job = job_service.enqueue_company_delete(company_id)
+        if not job:
+            raise NotFoundError(f'Company with ID {company_id} not found')
+        response = _job_accepted(job)
+        response.headers['Preference-Applied'] = 'respond-async'
+        return response
+    
     success = company_service.delete_company(company_id)
     
     if not success:
@@ -100,6 +107,7 @@ def delete_company(company_id):
 
 
 @companies_bp.route('/<int:company_id>/statistics', methods=['GET'])
+@deadline('search')
 def get_company_statistics(company_id):
     """Получить статистику по компании"""
     statistics = company_service.get_company_statistics(company_id)
@@ -107,4 +115,4 @@ def get_company_statistics(company_id):
     if not statistics:
         raise NotFoundError(f'Company with ID {company_id} not found')
     
-    return jsonify(statistics), 200
+    return json_response(statistics, 200)
@@ -1,6 +1,9 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify
 from services.company_client_service import CompanyClientService
+from models import CompanyClient
 from error_handlers import NotFoundError
+from schemas import CustomerQuery, decode_args, decode_sparse_args, json_response
+from deadlines import deadline
 
 company_clients_bp = Blueprint('company_clients', __name__)
 client_service = CompanyClientService()
@@ -8,20 +11,39 @@ client_service = CompanyClientService()
 
 @company_clients_bp.route('', methods=['GET'])
 def get_company_clients():
-    """Получить список всех клиентов"""
-    clients = client_service.get_all_clients()
-    return jsonify(clients), 200
+    """Получить список всех клиентов (?include=, ?fields=)"""
+    includes, fields = decode_sparse_args(CompanyClient)
+    clients = client_service.get_all_clients(includes, fields)
+    return json_response(clients, 200)
+
+
+@company_clients_bp.route('/by-customer', methods=['GET'])
+@deadline('search')
+def get_rentals_by_customer():
+    """Аренды клиента по всем точкам (?name=, ?match=exact|prefix|fuzzy, ?page=, ?per_page=, ?rentals_per_customer=)"""
+    query = decode_args(CustomerQuery)
+    
+    result = client_service.find_by_customer(
+        query.name,
+        query.match,
+        query.page,
+        query.per_page,
+        query.rentals_per_customer,
+        current_app.config['CUSTOMER_SEARCH_MIN_SIMILARITY']
+    )
+    return json_response(result, 200)
 
 
 @company_clients_bp.route('/<int:client_id>', methods=['GET'])
 def get_company_client(client_id):
-    """Получить клиента по ID"""
-    client = client_service.get_client_by_id(client_id)
+    """Получить клиента по ID (?include=, ?fields=)"""
+    includes, fields = decode_sparse_args(CompanyClient)
+    client = client_service.get_client_by_id(client_id, includes, fields)
     
     if not client:
         raise NotFoundError(f'Company client with ID {client_id} not found')
     
-    return jsonify(client), 200
+    return json_response(client, 200)
 
 
 @company_clients_bp.route('/<int:client_id>', methods=['DELETE'])
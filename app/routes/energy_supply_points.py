@@ -1,6 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, jsonify
 from services.energy_supply_point_service import EnergySupplyPointService
+from models import EnergySupplyPoint
 from error_handlers import ValidationError, NotFoundError
+from schemas import (
+    EnergySupplyPointCreate, EnergySupplyPointUpdate, RentalCreate, DateRangeQuery,
+    decode_body, decode_args, decode_sparse_args, changes, json_response
+)
+from idempotency import idempotent
+from deadlines import deadline
 
 
 energy_supply_points_bp = Blueprint('energy_supply_points', __name__)
@@ -9,84 +16,53 @@ energy_point_service = EnergySupplyPointService()
 
 @energy_supply_points_bp.route('', methods=['GET'])
 def get_energy_supply_points():
-    """Получить список всех точек поставки"""
-    points = energy_point_service.get_all_points()
-    return jsonify(points), 200
+    """Получить список всех точек поставки (?include=, ?fields=)"""
+    includes, fields = decode_sparse_args(EnergySupplyPoint)
+    points = energy_point_service.get_all_points(includes, fields)
+    return json_response(points, 200)
 
 
 @energy_supply_points_bp.route('/<int:point_id>', methods=['GET'])
 def get_energy_supply_point(point_id):
-    """Получить точку поставки по ID"""
-    point = energy_point_service.get_point_by_id(point_id)
+    """Получить точку поставки по ID (?include=, ?fields=)"""
+    includes, fields = decode_sparse_args(EnergySupplyPoint)
+    point = energy_point_service.get_point_by_id(point_id, includes, fields)
     
     if not point:
         raise NotFoundError(f'Energy supply point with ID {point_id} not found')
     
-    return jsonify(point), 200
+    return json_response(point, 200)
 
 
 @energy_supply_points_bp.route('', methods=['POST'])
 def create_energy_supply_point():
     """Создать новую точку поставки"""
-    data = request.get_json()
-    
-    if not data:
-        raise ValidationError('No data provided')
-    
-    # Валидация обязательных полей
-    required_fields = ['name', 'company_id', 'connection_date', 'max_power_kw']
-    missing_fields = [field for field in required_fields if field not in data]
-    
-    if missing_fields:
-        raise ValidationError(
-            f'Missing required fields: {", ".join(missing_fields)}',
-            payload={'missing_fields': missing_fields}
-        )
-    
-    # Валидация max_power_kw
-    try:
-        max_power = float(data['max_power_kw'])
-        if max_power <= 0:
-            raise ValidationError('max_power_kw must be greater than 0')
-    except (ValueError, TypeError):
-        raise ValidationError('max_power_kw must be a valid number')
+    data = decode_body(EnergySupplyPointCreate)
     
     point = energy_point_service.create_point(
-        data['name'],
-        data['company_id'],
-        data['connection_date'],
-        max_power
+        data.name,
+        data.company_id,
+        data.connection_date,
+        data.max_power_kw
     )
     
     if not point:
-        raise NotFoundError(f'Company with ID {data["company_id"]} not found')
+        raise NotFoundError(f'Company with ID {data.company_id} not found')
     
-    return jsonify(point), 201
+    return json_response(point, 201)
 
 
 @energy_supply_points_bp.route('/<int:point_id>', methods=['PUT'])
 def update_energy_supply_point(point_id):
     """Обновить точку поставки"""
-    data = request.get_json()
-    
-    if not data:
-        raise ValidationError('No data provided')
-    
-    # Валидация max_power_kw если присутствует
-    if 'max_power_kw' in data:
-        try:
-            max_power = float(data['max_power_kw'])
-            if max_power <= 0:
-                raise ValidationError('max_power_kw must be greater than 0')
-        except (ValueError, TypeError):
-            raise ValidationError('max_power_kw must be a valid number')
+    data = decode_body(EnergySupplyPointUpdate)
     
-    point = energy_point_service.update_point(point_id, data)
+    point = energy_point_service.update_point(point_id, changes(data))
     
     if not point:
         raise NotFoundError(f'Energy supply point with ID {point_id} not found or related company not found')
     
-    return jsonify(point), 200
+    return json_response(point, 200)
 
 
 @energy_supply_points_bp.route('/<int:point_id>', methods=['DELETE'])
@@ -104,57 +80,25 @@ def delete_energy_supply_point(point_id):
 
 
 @energy_supply_points_bp.route('/search', methods=['GET'])
+@deadline('search')
 def search_energy_supply_points():
     """Поиск точек поставки по дате присоединения"""
-    date_from = request.args.get('date_from')
-    date_to = request.args.get('date_to')
+    query = decode_args(DateRangeQuery)
     
-    # Валидация параметров поиска
-    if date_from or date_to:
-        if date_from and date_to:
-            # Проверка что date_from <= date_to будет в сервисе
-            pass
-        elif date_from:
-            # Только date_from
-            pass
-        elif date_to:
-            # Только date_to
-            pass
-    
-    points = energy_point_service.search_points_by_date(date_from, date_to)
-    return jsonify(points), 200
+    points = energy_point_service.search_points_by_date(query.date_from, query.date_to)
+    return json_response(points, 200)
 
 
 @energy_supply_points_bp.route('/<int:point_id>/rentals', methods=['POST'])
+@idempotent('rentals')
 def rent_energy(point_id):
     """Арендовать мощность"""
-    data = request.get_json()
-    
-    if not data:
-        raise ValidationError('No data provided')
-    
-    # Валидация обязательных полей
-    required_fields = ['company_name', 'quantity_power']
-    missing_fields = [field for field in required_fields if field not in data]
-    
-    if missing_fields:
-        raise ValidationError(
-            f'Missing required fields: {", ".join(missing_fields)}',
-            payload={'missing_fields': missing_fields}
-        )
-    
-    # Валидация quantity_power
-    try:
-        quantity_power = float(data['quantity_power'])
-        if quantity_power <= 0:
-            raise ValidationError('quantity_power must be greater than 0')
-    except (ValueError, TypeError):
-        raise ValidationError('quantity_power must be a valid number')
+    data = decode_body(RentalCreate)
     
     result = energy_point_service.rent_energy(
         point_id,
-        data['company_name'],
-        quantity_power
+        data.company_name,
+        data.quantity_power
     )
     
     if result['success']:
@@ -162,4 +106,3 @@ def rent_energy(point_id):
     else:
         # Сервис вернул ошибку
         raise ValidationError(result.get('message', 'Failed to rent energy'), payload=result)
-
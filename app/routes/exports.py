@@ -0,0 +1,34 @@
+from flask import Blueprint, Response, current_app, request, stream_with_context
+from services.export_service import ExportService, EXPORT_FORMATS
+from error_handlers import ValidationError
+from deadlines import deadline
+
+
+exports_bp = Blueprint('exports', __name__)
+export_service = ExportService()
+
+
+@exports_bp.route('/<table>', methods=['GET'])
+@deadline('stream')
+def export_table(table):
+    """Потоковая выгрузка таблицы в CSV, Arrow IPC или Parquet"""
+    export_format = request.args.get('format', 'csv')
+    includes = [name for name in request.args.get('include', '').split(',') if name]
+    includes = export_service.validate(table, export_format, includes)
+    
+    max_batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    try:
+        batch_size = int(request.args.get('batch_size', max_batch_size))
+    except ValueError:
+        raise ValidationError('batch_size must be a valid integer')
+    if batch_size <= 0:
+        raise ValidationError('batch_size must be greater than 0')
+    batch_size = min(batch_size, max_batch_size)
+    
+    chunks = export_service.stream(table, export_format, includes, batch_size)
+    extension = 'arrows' if export_format == 'arrow' else export_format
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename={table}.{extension}'}
+    )
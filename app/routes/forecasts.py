@@ -0,0 +1,18 @@
+from flask import Blueprint
+from services.forecast_service import ForecastService
+from schemas import ForecastRequest, decode_body, json_response
+from deadlines import deadline
+
+
+forecasts_bp = Blueprint('forecasts', __name__)
+forecast_service = ForecastService()
+
+
+@forecasts_bp.route('', methods=['POST'])
+@deadline('report')
+def create_forecast():
+    """Прогноз исчерпания мощности точек и компаний по сценариям спроса"""
+    data = decode_body(ForecastRequest)
+    
+    forecast = forecast_service.forecast(data)
+    return json_response(forecast, 200)
@@ -0,0 +1,19 @@
+from flask import Blueprint
+from services.job_service import JobService
+from error_handlers import NotFoundError
+from schemas import JobOut, json_response
+
+
+jobs_bp = Blueprint('jobs', __name__)
+job_service = JobService()
+
+
+@jobs_bp.route('/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Статус и прогресс фоновой задачи"""
+    job = job_service.get_job(job_id)
+    
+    if not job:
+        raise NotFoundError(f'Job with ID {job_id} not found')
+    
+    return json_response(JobOut.from_model(job), 200)
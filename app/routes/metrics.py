@@ -0,0 +1,11 @@
+from flask import Blueprint, Response
+from metrics import REGISTRY
+
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('', methods=['GET'])
+def get_metrics():
+    """Счетчики процесса в текстовом формате Prometheus"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,414 @@
+import re
+from datetime import date, datetime
+from typing import (
+    Annotated, Any, Dict, List, Literal, Optional, Tuple, Type, TypeVar, Union,
+    get_args, get_origin, get_type_hints
+)
+import msgspec
+from msgspec import UNSET, UnsetType
+from flask import Response, request
+from sqlalchemy import inspect
+from error_handlers import ValidationError
+
+
+S = TypeVar('S', bound=msgspec.Struct)
+
+VALID_STATUSES = ['active', 'inactive', 'pending']
+
+Status = Literal['active', 'inactive', 'pending']
+PositiveDecimal = Annotated[float, msgspec.Meta(gt=0)]
+
+
+# Схемы запросов
+
+class CompanyCreate(msgspec.Struct):
+    """Тело POST /api/companies"""
+    name: str
+    registration_date: date
+    status: Status
+
+
+class CompanyUpdate(msgspec.Struct):
+    """Тело PUT /api/companies/<id> (передаются только изменяемые поля)"""
+    name: Union[str, UnsetType] = UNSET
+    registration_date: Union[date, UnsetType] = UNSET
+    status: Union[Status, UnsetType] = UNSET
+
+
+class EnergySupplyPointCreate(msgspec.Struct):
+    """Тело POST /api/energy-supply-points"""
+    name: str
+    company_id: int
+    connection_date: date
+    max_power_kw: PositiveDecimal
+
+
+class EnergySupplyPointUpdate(msgspec.Struct):
+    """Тело PUT /api/energy-supply-points/<id>"""
+    name: Union[str, UnsetType] = UNSET
+    company_id: Union[int, UnsetType] = UNSET
+    connection_date: Union[date, UnsetType] = UNSET
+    max_power_kw: Union[PositiveDecimal, UnsetType] = UNSET
+
+
+class RentalCreate(msgspec.Struct):
+    """Тело POST /api/energy-supply-points/<id>/rentals"""
+    company_name: str
+    quantity_power: PositiveDecimal
+
+
+class EnergySupplyPointImport(msgspec.Struct):
+    """Точка поставки в составе импортируемой компании"""
+    name: str
+    connection_date: date
+    max_power_kw: PositiveDecimal
+
+
+class CompanyImportItem(msgspec.Struct):
+    """Компания в теле POST /api/companies/import"""
+    name: str
+    registration_date: date
+    status: Status
+    energy_supply_points: List[EnergySupplyPointImport] = []
+
+
+class CompanyImport(msgspec.Struct):
+    """Тело POST /api/companies/import"""
+    companies: Annotated[List[CompanyImportItem], msgspec.Meta(min_length=1)]
+
+
+class DateRangeQuery(msgspec.Struct):
+    """Параметры GET /api/energy-supply-points/search"""
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+
+class CustomerQuery(msgspec.Struct):
+    """Параметры GET /api/company-clients/by-customer"""
+    name: Annotated[str, msgspec.Meta(min_length=1, max_length=255)]
+    match: Literal['exact', 'prefix', 'fuzzy'] = 'prefix'
+    page: Annotated[int, msgspec.Meta(ge=1)] = 1
+    per_page: Annotated[int, msgspec.Meta(ge=1, le=100)] = 20
+    rentals_per_customer: Annotated[int, msgspec.Meta(ge=1, le=100)] = 20
+
+
+class ForecastScenario(msgspec.Struct):
+    """Сценарий спроса: рост арендованной мощности за период и новый спрос на точку за период"""
+    name: str
+    growth_rate: Annotated[float, msgspec.Meta(ge=0, le=10)] = 0.0
+    added_demand_kw: Annotated[float, msgspec.Meta(ge=0)] = 0.0
+
+
+class ForecastRequest(msgspec.Struct):
+    """Тело POST /api/forecasts"""
+    scenarios: Annotated[List[ForecastScenario], msgspec.Meta(min_length=1, max_length=50)]
+    period_days: Annotated[int, msgspec.Meta(ge=1)] = 91
+    horizon_days: Annotated[int, msgspec.Meta(ge=1, le=36500)] = 1825
+    start_date: Optional[date] = None
+    company_ids: Optional[List[int]] = None
+    limit: Annotated[int, msgspec.Meta(ge=0, le=1000)] = 100
+
+
+# Схемы ответов
+
+class ResponseSchema(msgspec.Struct):
+    """Базовая схема ответа, заполняется из атрибутов модели"""
+    
+    @classmethod
+    def from_model(cls: Type[S], entity: Any) -> S:
+        return msgspec.convert(entity, cls, from_attributes=True)
+
+
+class CompanyOut(ResponseSchema):
+    id: int
+    name: str
+    registration_date: Optional[date]
+    status: str
+    created_at: Optional[datetime]
+
+
+class EnergySupplyPointOut(ResponseSchema):
+    id: int
+    name: str
+    company_id: int
+    connection_date: Optional[date]
+    max_power_kw: Optional[float]
+    created_at: Optional[datetime]
+
+
+class CompanyClientOut(ResponseSchema):
+    id: int
+    energy_supply_point_id: int
+    company_name: str
+    quantity_power: Optional[float]
+    created_at: Optional[datetime]
+
+
+class CompanyStatisticsOut(ResponseSchema):
+    company_id: int
+    total_supply_points: int
+    max_total_power: float
+
+
+class CustomerRentalOut(ResponseSchema):
+    id: int
+    energy_supply_point_id: int
+    energy_supply_point_name: str
+    quantity_power: float
+    created_at: Optional[datetime]
+
+
+class CustomerRentalsOut(ResponseSchema):
+    company_name: str
+    rentals_count: int
+    total_power_kw: float
+    similarity: float
+    rentals: List[CustomerRentalOut]
+
+
+class CustomerRentalsPage(ResponseSchema):
+    items: List[CustomerRentalsOut]
+    page: int
+    per_page: int
+    rentals_per_customer: int
+    total: int
+
+
+class PointForecastOut(ResponseSchema):
+    point_id: int
+    company_id: int
+    max_power_kw: float
+    rented_kw: float
+    headroom_kw: float
+    projected_rented_kw: float
+    projected_headroom_kw: float
+    exhaustion_date: Optional[date]
+
+
+class CompanyForecastOut(ResponseSchema):
+    company_id: int
+    points: int
+    max_power_kw: float
+    rented_kw: float
+    projected_rented_kw: float
+    projected_headroom_kw: float
+    points_exhausted: int
+    first_exhaustion_date: Optional[date]
+
+
+class ScenarioForecastOut(ResponseSchema):
+    name: str
+    growth_rate: float
+    added_demand_kw: float
+    points_exhausted: int
+    first_exhaustion_date: Optional[date]
+    points: List[PointForecastOut]
+    companies: List[CompanyForecastOut]
+
+
+class ForecastOut(ResponseSchema):
+    start_date: date
+    horizon_date: date
+    period_days: int
+    points_total: int
+    scenarios: List[ScenarioForecastOut]
+
+
+class JobOut(ResponseSchema):
+    id: int
+    kind: str
+    status: str
+    attempts: int
+    max_attempts: int
+    progress_done: int
+    progress_total: Optional[int]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    run_at: Optional[datetime]
+    created_at: Optional[datetime]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+
+# Декодеры компилируются один раз на схему
+_decoders: Dict[type, msgspec.json.Decoder] = {}
+_encoder = msgspec.json.Encoder()
+
+# Путь к полю в ошибке msgspec: ' - at `$.companies[0].energy_supply_points[1].name`'
+_ERROR_PATH = re.compile(r' - at `\$\.?([^`]*)`$')
+_PATH_PART = re.compile(r'\.?(\w+)|\[(\d+)\]')
+_FIELDS_ARG = re.compile(r'^fields(?:\[([\w.]+)\])?$')
+
+# Максимальная вложенность ?include= (например, energy_supply_points.company_clients)
+MAX_INCLUDE_DEPTH = 2
+
+
+def _decoder(schema: type) -> msgspec.json.Decoder:
+    decoder = _decoders.get(schema)
+    if decoder is None:
+        # strict=False: числа в строках ("3000") принимаются, как и раньше через float()
+        decoder = _decoders[schema] = msgspec.json.Decoder(schema, strict=False)
+    return decoder
+
+
+def _field_type(schema: type, path: str) -> Any:
+    """Аннотация поля по пути из ошибки msgspec (None - путь не ведет к полю структуры)"""
+    field_type = schema
+    for name, index in _PATH_PART.findall(path):
+        while get_origin(field_type) is Annotated:
+            field_type = get_args(field_type)[0]
+        if index:
+            # Элемент списка
+            args = get_args(field_type)
+            field_type = args[0] if args else None
+        elif isinstance(field_type, type) and issubclass(field_type, msgspec.Struct):
+            field_type = get_type_hints(field_type, include_extras=True).get(name)
+        else:
+            return None
+    return field_type
+
+
+def _validation_error(schema: type, body: bytes, error: msgspec.ValidationError,
+                      allow_empty: bool = False) -> ValidationError:
+    """
+    Перевести ошибку msgspec в ValidationError с прежними текстами ответов.
+    
+    Поля вложенных объектов называются полным путем: energy_supply_points[0].name.
+    """
+    message = str(error)
+    match = _ERROR_PATH.search(message)
+    path = match.group(1) if match else ''
+    reason = message[:match.start()] if match else message
+    
+    if message.startswith('Object missing required field'):
+        data = msgspec.json.decode(body)
+        if not path and not data and not allow_empty:
+            return ValidationError('No data provided')
+        # msgspec сообщает только о первом поле: остальные ищем в объекте по тому же пути
+        for name, index in _PATH_PART.findall(path):
+            data = data[int(index)] if index else data[name]
+        prefix = f'{path}.' if path else ''
+        missing_fields = [
+            prefix + field.name for field in msgspec.structs.fields(_field_type(schema, path))
+            if field.required and field.name not in data
+        ]
+        return ValidationError(
+            f'Missing required fields: {", ".join(missing_fields)}',
+            payload={'missing_fields': missing_fields}
+        )
+    
+    field = path.rsplit('.', 1)[-1]
+    field_type = _field_type(schema, path)
+    # У полей верхнего уровня тексты прежние, у вложенных добавляется путь
+    at = f' at {path}' if path != field else ''
+    
+    if field == 'status':
+        return ValidationError(
+            f'Invalid status{at}. Must be one of: {", ".join(VALID_STATUSES)}',
+            payload={'valid_statuses': VALID_STATUSES}
+        )
+    if field_type in (date, Union[date, UnsetType], Optional[date]):
+        return ValidationError(f'Invalid date format{at}. Use YYYY-MM-DD')
+    if field_type in (PositiveDecimal, Union[PositiveDecimal, UnsetType]):
+        if '> 0' in message:
+            return ValidationError(f'{path} must be greater than 0')
+        return ValidationError(f'{path} must be a valid number')
+    if path:
+        return ValidationError(f'Invalid value for {path}: {reason}')
+    return ValidationError(reason)
+
+
+def decode_body(schema: Type[S]) -> S:
+    """Декодировать тело запроса в типизированную структуру за один проход"""
+    body = request.get_data()
+    if not body.strip():
+        raise ValidationError('No data provided')
+    
+    try:
+        result = _decoder(schema).decode(body)
+    except msgspec.ValidationError as error:
+        raise _validation_error(schema, body, error)
+    except msgspec.DecodeError:
+        raise ValidationError('Request body must be valid JSON')
+    
+    if not any(value is not UNSET for value in msgspec.structs.astuple(result)):
+        raise ValidationError('No data provided')
+    return result
+
+
+def decode_args(schema: Type[S]) -> S:
+    """Декодировать параметры строки запроса в структуру"""
+    args = request.args.to_dict()
+    try:
+        return msgspec.convert(args, schema, strict=False)
+    except msgspec.ValidationError as error:
+        # Пустая строка запроса - пустой объект: отсутствующие параметры перечисляются по имени
+        raise _validation_error(schema, msgspec.json.encode(args), error, allow_empty=True)
+
+
+def _split(value: str) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def decode_sparse_args(model: type) -> Tuple[List[str], Dict[str, List[str]]]:
+    """
+    Разобрать ?include= и ?fields= для модели.
+    
+    include - пути связей через точку (energy_supply_points.company_clients),
+    fields - колонки корневой сущности, fields[<путь>] - колонки вложенной.
+    Возвращает (includes, fields), где ключ '' в fields - корневая сущность.
+    """
+    includes = []
+    targets = {'': model}
+    for path in _split(request.args.get('include', '')):
+        parts = path.split('.')
+        if len(parts) > MAX_INCLUDE_DEPTH:
+            raise ValidationError(f'Include path is too deep: {path}')
+        target = model
+        for depth, name in enumerate(parts, start=1):
+            relationship = inspect(target).relationships.get(name)
+            if relationship is None:
+                raise ValidationError(
+                    f'Invalid include: {path}',
+                    payload={'valid_includes': list(inspect(target).relationships.keys())}
+                )
+            target = relationship.mapper.class_
+            prefix = '.'.join(parts[:depth])
+            # Вложенная связь подразумевает загрузку родительской
+            if prefix not in targets:
+                targets[prefix] = target
+                includes.append(prefix)
+    
+    fields = {}
+    for key, value in request.args.items():
+        match = _FIELDS_ARG.match(key)
+        if not match:
+            continue
+        path = match.group(1) or ''
+        if path not in targets:
+            raise ValidationError(f'fields[{path}] requires include={path}')
+        names = _split(value)
+        valid_names = targets[path].column_names()
+        invalid = [name for name in names if name not in valid_names]
+        if invalid:
+            raise ValidationError(
+                f'Invalid fields: {", ".join(invalid)}',
+                payload={'valid_fields': valid_names}
+            )
+        fields[path] = names
+    
+    return includes, fields
+
+
+def changes(struct: msgspec.Struct) -> Dict[str, Any]:
+    """Поля, переданные в запросе на обновление"""
+    return {
+        name: value
+        for name, value in zip(struct.__struct_fields__, msgspec.structs.astuple(struct))
+        if value is not UNSET
+    }
+
+
+def json_response(data: Any, status: int = 200) -> Response:
+    """Ответ JSON, закодированный msgspec (структуры, списки и словари)"""
+    return Response(_encoder.encode(data), status=status, mimetype='application/json')
@@ -1,10 +1,24 @@
 from services.company_service import CompanyService
 from services.energy_supply_point_service import EnergySupplyPointService
 from services.company_client_service import CompanyClientService
+from services.idempotency_service import IdempotencyService
+from services.export_service import ExportService
+from services.change_feed_service import ChangeFeedService
+from services.capacity_ledger import CapacityLedger
+from services.job_service import JobService
+from services.job_runner import JobRunner
+from services.forecast_service import ForecastService
 
 
 __all__ = [
     'CompanyService',
     'EnergySupplyPointService',
-    'CompanyClientService'
+    'CompanyClientService',
+    'IdempotencyService',
+    'ExportService',
+    'ChangeFeedService',
+    'CapacityLedger',
+    'JobService',
+    'JobRunner',
+    'ForecastService'
 ]
@@ -0,0 +1,318 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterable, List, Optional
+from flask import Flask, current_app
+from error_handlers import APIError
+from models import db
+from repositories.capacity_ledger_repository import CapacityLedgerRepository
+
+
+logger = logging.getLogger(__name__)
+
+# Точность колонки company_clients.quantity_power (DECIMAL(10, 2))
+POWER_PRECISION = Decimal('0.01')
+
+# Журнал переписывается без перенесенных записей после стольких переносов
+COMPACT_AFTER_ENTRIES = 10000
+
+
+class WriteAheadLog:
+    """
+    Журнал принятых аренд в формате JSON Lines.
+    
+    Аренда подтверждается клиенту только после fsync; параллельные запросы
+    разделяют один fsync (групповая фиксация).
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._written = 0
+        self._synced = 0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+    
+    def read(self) -> List[dict]:
+        """Прочитать записи, оставшиеся после предыдущего запуска"""
+        entries = []
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, 'rb') as file:
+            for line in file:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # Оборванная запись: fsync не завершился, клиент не получил подтверждения
+                    logger.warning('Ignoring torn record at the end of %s', self.path)
+                    break
+        return entries
+    
+    def append(self, entry: dict) -> int:
+        """Дописать запись; возвращает позицию для sync()"""
+        line = json.dumps(entry, ensure_ascii=False).encode() + b'\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._written += 1
+            return self._written
+    
+    def sync(self, position: int) -> None:
+        """Дождаться записи на диск; один fsync подтверждает все строки, записанные до него"""
+        with self._sync_lock:
+            if self._synced >= position:
+                return
+            with self._lock:
+                target = self._written
+                fileno = self._file.fileno()
+            os.fsync(fileno)
+            self._synced = target
+    
+    def rewrite(self, entries: List[dict]) -> None:
+        """Атомарно заменить журнал указанными записями"""
+        with self._sync_lock, self._lock:
+            temp_path = f'{self.path}.tmp'
+            with open(temp_path, 'wb') as file:
+                for entry in entries:
+                    file.write(json.dumps(entry, ensure_ascii=False).encode() + b'\n')
+                file.flush()
+                os.fsync(file.fileno())
+            if self._file is not None:
+                self._file.close()
+            os.replace(temp_path, self.path)
+            directory = os.open(os.path.dirname(self.path), os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+            self._file = open(self.path, 'ab')
+            self._synced = self._written
+
+
+class CapacityLedger:
+    """
+    Учет свободной мощности закрепленных горячих точек в памяти процесса.
+    
+    Точки распределяются по слотам остатком от деления: point_id % CAPACITY_LEDGER_WORKERS.
+    Процесс занимает свободный слот блокировкой flock на файле слота и становится
+    единственным владельцем его точек: принимает или отклоняет аренды без обращения
+    к БД, пишет принятые в журнал на диске и пачками переносит их в company_clients.
+    Свободная мощность сверяется с БД при запуске и по таймеру.
+    """
+    
+    def __init__(self, app: Flask):
+        config = app.config
+        self.app = app
+        self.point_ids = frozenset(config['CAPACITY_LEDGER_POINTS'])
+        self.workers = config['CAPACITY_LEDGER_WORKERS']
+        self.preferred_index = config['CAPACITY_LEDGER_WORKER_INDEX'] % self.workers
+        # Слот, занятый этим процессом (None - все слоты заняты другими процессами)
+        self.worker_index: Optional[int] = None
+        self.flush_interval = config['CAPACITY_LEDGER_FLUSH_INTERVAL_MS'] / 1000
+        self.batch_size = config['CAPACITY_LEDGER_FLUSH_BATCH_SIZE']
+        self.reconcile_interval = config['CAPACITY_LEDGER_RECONCILE_SECONDS']
+        self.directory = config['CAPACITY_LEDGER_WAL_DIR']
+        self.wal: Optional[WriteAheadLog] = None
+        self.ledger_repo = CapacityLedgerRepository()
+        
+        self._available: Dict[int, Optional[Decimal]] = {}
+        self._pending: List[dict] = []
+        self._seq = 0
+        self._flushed_since_compaction = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._lock_file = None
+        self._started = False
+    
+    @property
+    def owned_point_ids(self) -> List[int]:
+        return sorted(point_id for point_id in self.point_ids if self.owner(point_id) == self.worker_index)
+    
+    def owner(self, point_id: int) -> Optional[int]:
+        """Индекс воркера-владельца закрепленной точки (None - точка не закреплена)"""
+        if point_id not in self.point_ids:
+            return None
+        return point_id % self.workers
+    
+    def _claim_slot(self) -> Optional[int]:
+        """Занять свободный слот, начиная с CAPACITY_LEDGER_WORKER_INDEX"""
+        os.makedirs(self.directory, exist_ok=True)
+        for offset in range(self.workers):
+            index = (self.preferred_index + offset) % self.workers
+            lock_file = open(os.path.join(self.directory, f'ledger-{index}.jsonl.lock'), 'w')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                continue
+            # Блокировка держится, пока открыт файл, то есть до завершения процесса
+            self._lock_file = lock_file
+            return index
+        return None
+    
+    def start(self) -> None:
+        """
+        Занять слот, восстановить его журнал, сверить мощность с БД и запустить фоновый перенос.
+        
+        Вызывается при первом обращении: процесс-наблюдатель перезагрузчика
+        Flask запросы не обслуживает и журнал не открывает. Процесс без слота
+        повторяет попытку при следующем обращении и забирает слот завершившегося владельца.
+        """
+        with self._start_lock:
+            if self._started:
+                return
+            self.worker_index = self._claim_slot()
+            if self.worker_index is None:
+                return
+            self.wal = WriteAheadLog(os.path.join(self.directory, f'ledger-{self.worker_index}.jsonl'))
+            
+            entries = self.wal.read()
+            last_seq = self.ledger_repo.get_last_seq(self.worker_index)
+            self._pending = [entry for entry in entries if entry['seq'] > last_seq]
+            self._seq = max([last_seq] + [entry['seq'] for entry in entries])
+            self.wal.rewrite(self._pending)
+            if self._pending:
+                logger.info('Recovered %d unsaved rentals from %s', len(self._pending), self.wal.path)
+            
+            self.reconcile()
+            threading.Thread(target=self._run, name='capacity-ledger', daemon=True).start()
+            self._started = True
+            logger.info('Capacity ledger slot %d of %d claimed', self.worker_index, self.workers)
+    
+    def rent(self, point_id: int, company_name: str, quantity_power: float) -> Dict[str, Any]:
+        """Арендовать мощность закрепленной точки (ответ как у хранимой функции rent_energy)"""
+        self.start()
+        owner = self.owner(point_id)
+        if owner != self.worker_index:
+            raise APIError(
+                f'Energy supply point {point_id} is served by ledger worker {owner}',
+                status_code=421,
+                payload={'owner_worker_index': owner}
+            )
+        
+        requested_power = Decimal(repr(float(quantity_power)))
+        with self._lock:
+            available_power = self._available.get(point_id)
+            if available_power is None:
+                return {'success': False, 'message': 'Energy supply point not found'}
+            if available_power < requested_power:
+                return {
+                    'success': False,
+                    'message': f'Insufficient power. Available: {available_power} kW, Requested: {requested_power} kW'
+                }
+            
+            stored_power = requested_power.quantize(POWER_PRECISION, rounding=ROUND_HALF_UP)
+            self._available[point_id] = available_power - stored_power
+            self._seq += 1
+            entry = {
+                'seq': self._seq,
+                'point_id': point_id,
+                'company_name': company_name,
+                'quantity_power': str(stored_power),
+                'created_at': datetime.utcnow().isoformat()
+            }
+            self._pending.append(entry)
+            position = self.wal.append(entry)
+            pending_count = len(self._pending)
+        
+        self.wal.sync(position)
+        if pending_count >= self.batch_size:
+            self._wake.set()
+        return {'success': True, 'message': 'Energy rented successfully'}
+    
+    def refresh(self, point_ids: Optional[Iterable[int]] = None) -> None:
+        """Сверить мощность после изменения точек или клиентов в этом процессе"""
+        if not self._started:
+            return
+        if point_ids is not None:
+            point_ids = [point_id for point_id in point_ids if self.owner(point_id) == self.worker_index]
+            if not point_ids:
+                return
+        self.reconcile(point_ids)
+    
+    def reconcile(self, point_ids: Optional[Iterable[int]] = None, report_drift: bool = False) -> None:
+        """
+        Пересчитать свободную мощность по БД.
+        
+        Перенос в это время не выполняется, поэтому аренды, еще не сохраненные
+        в company_clients, учитываются ровно один раз - из очереди журнала.
+        report_drift - записать в лог расхождения (изменения в обход журнала).
+        """
+        point_ids = self.owned_point_ids if point_ids is None else list(point_ids)
+        with self._flush_lock:
+            capacities = self.ledger_repo.get_capacities(point_ids)
+            with self._lock:
+                reserved = defaultdict(Decimal)
+                for entry in self._pending:
+                    reserved[entry['point_id']] += Decimal(entry['quantity_power'])
+                
+                for point_id in point_ids:
+                    if point_id in capacities:
+                        max_power, used_power = capacities[point_id]
+                        available_power = max_power - used_power - reserved[point_id]
+                    else:
+                        available_power = None
+                    previous = self._available.get(point_id)
+                    if report_drift and previous != available_power:
+                        logger.warning(
+                            'Capacity ledger drift for point %s: %s -> %s kW',
+                            point_id, previous, available_power
+                        )
+                    self._available[point_id] = available_power
+    
+    def flush(self) -> int:
+        """Перенести пачку принятых аренд в company_clients; возвращает размер пачки"""
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending[:self.batch_size]
+            if not batch:
+                return 0
+            
+            skipped = self.ledger_repo.save_entries(self.worker_index, batch)
+            if skipped:
+                logger.warning('Dropped %d rentals of deleted supply points', skipped)
+            
+            with self._lock:
+                # Новые записи только дописываются в конец, перенос выполняется одним потоком
+                del self._pending[:len(batch)]
+                self._flushed_since_compaction += len(batch)
+                if self._flushed_since_compaction >= COMPACT_AFTER_ENTRIES:
+                    self.wal.rewrite(self._pending)
+                    self._flushed_since_compaction = 0
+            return len(batch)
+    
+    def _run(self) -> None:
+        next_reconcile = time.monotonic() + self.reconcile_interval
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            with self.app.app_context():
+                try:
+                    while self.flush() == self.batch_size:
+                        pass
+                    if time.monotonic() >= next_reconcile:
+                        self.reconcile(report_drift=True)
+                        next_reconcile = time.monotonic() + self.reconcile_interval
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Capacity ledger flush failed, retrying')
+
+
+def get_capacity_ledger() -> Optional[CapacityLedger]:
+    """Журнал текущего приложения (None, если горячие точки не закреплены)"""
+    return current_app.extensions.get('capacity_ledger')
+
+
+def register_capacity_ledger(app: Flask):
+    """Подключение журнала горячих точек (только при заданном CAPACITY_LEDGER_POINTS)"""
+    if not app.config.get('CAPACITY_LEDGER_POINTS'):
+        return
+    app.extensions['capacity_ledger'] = CapacityLedger(app)
@@ -0,0 +1,173 @@
+import queue
+import re
+import threading
+from typing import Any, Dict, Iterator, Optional, Tuple
+from flask import Flask, current_app
+from models import db
+from repositories.change_event_repository import ChangeEventRepository
+from services.pg_listener import PgListener
+
+CHANNEL = 'energy_changes'
+CATCH_UP_PAGE_SIZE = 500
+
+
+def parse_cursor(value: str) -> Tuple[int, int]:
+    """
+    Курсор ленты '<txid>-<id>' в пару (txid, id).
+    
+    Число без txid - курсор старого формата, он указывает на события до появления txid.
+    """
+    match = re.fullmatch(r'(?:(\d+)-)?(\d+)', value)
+    if match is None:
+        raise ValueError(value)
+    txid, event_id = match.groups()
+    return int(txid or 0), int(event_id)
+
+
+def format_cursor(position: Tuple[int, int]) -> str:
+    return f'{position[0]}-{position[1]}'
+
+
+class Subscription:
+    """Очередь событий одного подписчика"""
+    
+    def __init__(self, maxsize: int):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+    
+    def put(self, item) -> None:
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            # Медленный подписчик догонит пропущенное из журнала
+            self.overflowed = True
+
+
+class ChangeFeedService:
+    """
+    Лента изменений: один слушатель LISTEN на процесс.
+    
+    Уведомление только будит слушателя: события читаются из таблицы change_events
+    в порядке курсора (txid, id) до горизонта завершенных транзакций и раздаются
+    всем подписчикам SSE. Поэтому живые события идут в том же порядке, что
+    и при догоняющем чтении, и ни одно не теряется при разном порядке фиксации.
+    """
+    
+    def __init__(self):
+        self.change_event_repo = ChangeEventRepository()
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._app: Optional[Flask] = None
+        # Курсор последнего разосланного события (только поток слушателя)
+        self._position: Optional[Tuple[int, int]] = None
+        self.listener = PgListener(
+            CHANNEL,
+            on_wake=self._poll,
+            on_idle=self._purge_expired
+        )
+    
+    def subscribe(self) -> Subscription:
+        """Зарегистрировать подписчика; слушатель запускается при первой подписке"""
+        app = current_app._get_current_object()
+        self._app = app
+        self.listener.idle_interval = app.config['CHANGE_FEED_PURGE_INTERVAL_SECONDS']
+        self.listener.wake_interval = app.config['CHANGE_FEED_POLL_INTERVAL_SECONDS']
+        self.listener.start(app)
+        
+        subscription = Subscription(app.config['CHANGE_FEED_QUEUE_SIZE'])
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+    
+    def events(self, cursor: Optional[Tuple[int, int]]) -> Iterator[Optional[Dict[str, Any]]]:
+        """
+        Поток событий после курсора (txid, id).
+        
+        Сначала отдаются сохраненные события из журнала, затем живые.
+        None означает, что событий не было в течение keepalive-интервала.
+        """
+        keepalive = current_app.config['CHANGE_FEED_KEEPALIVE_SECONDS']
+        # Подписываемся до чтения журнала, чтобы не потерять события между ними
+        subscription = self.subscribe()
+        last = cursor
+        try:
+            if cursor is not None:
+                first = self.change_event_repo.get_first_position()
+                if first is not None and cursor < first:
+                    # Событие курсора уже удалено по сроку хранения: клиенту нужно перечитать состояние
+                    yield {'cursor': format_cursor(cursor), 'reset': True}
+                for event in self._catch_up(cursor):
+                    last = (event['txid'], event['id'])
+                    yield event
+            
+            while True:
+                try:
+                    item = subscription.queue.get(timeout=keepalive)
+                except queue.Empty:
+                    yield None
+                    continue
+                
+                if subscription.overflowed:
+                    subscription.overflowed = False
+                    if last is not None:
+                        for event in self._catch_up(last):
+                            last = (event['txid'], event['id'])
+                            yield event
+                
+                # Слушатель раздает события по возрастанию курсора, дубликаты догоняющего чтения отбрасываются
+                position = (item['txid'], item['id'])
+                if last is not None and position <= last:
+                    continue
+                last = position
+                yield item
+        finally:
+            self.unsubscribe(subscription)
+    
+    def _catch_up(self, position: Tuple[int, int]) -> Iterator[Dict[str, Any]]:
+        while True:
+            events = [
+                self.change_event_repo.to_dict(event)
+                for event in self.change_event_repo.get_after(position, CATCH_UP_PAGE_SIZE)
+            ]
+            # Не держим соединение из пула между чтениями длинного потока
+            db.session.commit()
+            yield from events
+            if len(events) < CATCH_UP_PAGE_SIZE:
+                return
+            position = (events[-1]['txid'], events[-1]['id'])
+    
+    def _broadcast(self, item) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(item)
+    
+    def _poll(self) -> None:
+        """
+        Разослать новые события журнала (поток слушателя).
+        
+        Вызывается после уведомлений, после переподключения и по таймеру:
+        события транзакции, которую задерживает более старая незавершенная,
+        становятся доступны без нового уведомления.
+        """
+        if self._app is None:
+            return
+        with self._app.app_context():
+            try:
+                if self._position is None:
+                    self._position = self.change_event_repo.get_last_position()
+                for event in self._catch_up(self._position):
+                    self._position = (event['txid'], event['id'])
+                    self._broadcast(event)
+            finally:
+                db.session.rollback()
+    
+    def _purge_expired(self) -> None:
+        if self._app is None:
+            return
+        with self._app.app_context():
+            self.change_event_repo.purge_older_than(self._app.config['CHANGE_FEED_RETENTION_HOURS'])
@@ -1,5 +1,8 @@
-from typing import List, Dict, Any, Optional
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Sequence, Union
 from repositories.company_client_repository import CompanyClientRepository
+from services.capacity_ledger import get_capacity_ledger
+from schemas import CompanyClientOut, CustomerRentalOut, CustomerRentalsOut, CustomerRentalsPage
 
 
 class CompanyClientService:
@@ -8,16 +11,67 @@ class CompanyClientService:
     def __init__(self):
         self.client_repo = CompanyClientRepository()
     
-    def get_all_clients(self) -> List[Dict[str, Any]]:
-        """Получить всех клиентов"""
-        clients = self.client_repo.get_all()
-        return [self.client_repo.to_dict(client) for client in clients]
+    def get_all_clients(self, includes: Sequence[str] = (), fields: Optional[Dict[str, List[str]]] = None) -> List[Union[CompanyClientOut, Dict[str, Any]]]:
+        """Получить всех клиентов (с вложенными связями и выбранными полями)"""
+        if not includes and not fields:
+            clients = self.client_repo.get_all()
+            return [CompanyClientOut.from_model(client) for client in clients]
+        
+        options = self.client_repo.loader_options(includes, fields or {})
+        clients = self.client_repo.get_all(options)
+        return [self.client_repo.to_sparse_dict(client, includes, fields or {}) for client in clients]
     
-    def get_client_by_id(self, client_id: int) -> Optional[Dict[str, Any]]:
+    def get_client_by_id(self, client_id: int, includes: Sequence[str] = (), fields: Optional[Dict[str, List[str]]] = None) -> Optional[Union[CompanyClientOut, Dict[str, Any]]]:
         """Получить клиента по ID"""
-        client = self.client_repo.get_by_id(client_id)
-        return self.client_repo.to_dict(client) if client else None
+        if not includes and not fields:
+            client = self.client_repo.get_by_id(client_id)
+            return CompanyClientOut.from_model(client) if client else None
+        
+        options = self.client_repo.loader_options(includes, fields or {})
+        client = self.client_repo.get_by_id(client_id, options)
+        return self.client_repo.to_sparse_dict(client, includes, fields or {}) if client else None
     
     def delete_client(self, client_id: int) -> bool:
         """Удалить клиента"""
-        return self.client_repo.delete_by_id(client_id)
+        deleted = self.client_repo.delete_by_id(client_id)
+        
+        ledger = get_capacity_ledger()
+        if ledger and deleted:
+            ledger.refresh()
+        return deleted
+    
+    def find_by_customer(self, name: str, match: str, page: int, per_page: int, rentals_per_customer: int,
+                         min_similarity: float) -> CustomerRentalsPage:
+        """
+        Аренды клиента (по имени, префиксу или нечетко) по всем точкам с суммарной мощностью.
+        
+        rentals_count и total_power_kw считаются по всем арендам клиента,
+        в rentals - первые rentals_per_customer из них.
+        """
+        total, groups = self.client_repo.search_by_customer(
+            name, match, per_page, (page - 1) * per_page, rentals_per_customer, min_similarity
+        )
+        items = [
+            CustomerRentalsOut(
+                company_name=group['company_name'],
+                rentals_count=group['rentals_count'],
+                total_power_kw=float(group['total_power_kw']),
+                similarity=round(float(group['similarity']), 4),
+                rentals=[
+                    CustomerRentalOut(
+                        id=rental['id'],
+                        energy_supply_point_id=rental['energy_supply_point_id'],
+                        energy_supply_point_name=rental['energy_supply_point_name'],
+                        quantity_power=float(rental['quantity_power']),
+                        # json_agg отдает даты строками ISO 8601
+                        created_at=datetime.fromisoformat(rental['created_at'])
+                        if isinstance(rental['created_at'], str) else rental['created_at']
+                    )
+                    for rental in group['rentals']
+                ]
+            )
+            for group in groups
+        ]
+        return CustomerRentalsPage(
+            items=items, page=page, per_page=per_page, rentals_per_customer=rentals_per_customer, total=total
+        )
@@ -1,5 +1,8 @@
-from typing import List, Dict, Any, Optional
+from datetime import date
+from typing import List, Dict, Any, Optional, Sequence, Union
 from repositories.company_repository import CompanyRepository
+from services.capacity_ledger import get_capacity_ledger
+from schemas import CompanyOut, CompanyStatisticsOut
 
 
 class CompanyService:
@@ -8,29 +11,39 @@ class CompanyService:
     def __init__(self):
         self.company_repo = CompanyRepository()
     
-    def get_all_companies(self) -> List[Dict[str, Any]]:
-        """Получить все компании"""
-        companies = self.company_repo.get_all()
-        return [self.company_repo.to_dict(company) for company in companies]
+    def get_all_companies(self, includes: Sequence[str] = (), fields: Optional[Dict[str, List[str]]] = None) -> List[Union[CompanyOut, Dict[str, Any]]]:
+        """Получить все компании (с вложенными связями и выбранными полями)"""
+        if not includes and not fields:
+            companies = self.company_repo.get_all()
+            return [CompanyOut.from_model(company) for company in companies]
+        
+        options = self.company_repo.loader_options(includes, fields or {})
+        companies = self.company_repo.get_all(options)
+        return [self.company_repo.to_sparse_dict(company, includes, fields or {}) for company in companies]
     
-    def get_company_by_id(self, company_id: int) -> Optional[Dict[str, Any]]:
+    def get_company_by_id(self, company_id: int, includes: Sequence[str] = (), fields: Optional[Dict[str, List[str]]] = None) -> Optional[Union[CompanyOut, Dict[str, Any]]]:
         """Получить компанию по ID"""
-        company = self.company_repo.get_by_id(company_id)
-        return self.company_repo.to_dict(company) if company else None
+        if not includes and not fields:
+            company = self.company_repo.get_by_id(company_id)
+            return CompanyOut.from_model(company) if company else None
+        
+        options = self.company_repo.loader_options(includes, fields or {})
+        company = self.company_repo.get_by_id(company_id, options)
+        return self.company_repo.to_sparse_dict(company, includes, fields or {}) if company else None
     
-    def create_company(self, name: str, registration_date: str, status: str) -> Dict[str, Any]:
+    def create_company(self, name: str, registration_date: date, status: str) -> CompanyOut:
         """Создать новую компанию"""
         company = self.company_repo.create(name, registration_date, status)
-        return self.company_repo.to_dict(company)
+        return CompanyOut.from_model(company)
     
-    def update_company(self, company_id: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def update_company(self, company_id: int, data: Dict[str, Any]) -> Optional[CompanyOut]:
         """Обновить компанию"""
         company = self.company_repo.get_by_id(company_id)
         if not company:
             return None
         
         updated_company = self.company_repo.update(company, data)
-        return self.company_repo.to_dict(updated_company)
+        return CompanyOut.from_model(updated_company)
     
     def delete_company(self, company_id: int) -> bool:
         """Удалить компанию"""
@@ -39,9 +52,56 @@ class CompanyService:
             return False
         
         self.company_repo.delete(company)
+        
+        # Вместе с компанией каскадно удалены ее точки поставки
+        ledger = get_capacity_ledger()
+        if ledger:
+            ledger.refresh()
         return True
     
-    def get_company_statistics(self, company_id: int) -> Optional[Dict[str, Any]]:
+    def delete_company_job(self, payload: Dict[str, Any], progress) -> Dict[str, Any]:
+        """
+        Фоновое удаление компании пачками: клиенты, точки поставки, затем сама компания.
+        
+        Каждая пачка фиксируется вместе с прогрессом задачи, поэтому удаление
+        не держит длинную транзакцию и продолжается после повтора.
+        """
+        company_id = payload['company_id']
+        clients, points = self.company_repo.count_dependents(company_id)
+        progress.commit(total=progress.done + clients + points + 1)
+        
+        while True:
+            deleted = (
+                self.company_repo.delete_clients_batch(company_id, progress.batch_size)
+                or self.company_repo.delete_points_batch(company_id, progress.batch_size)
+            )
+            if not deleted:
+                break
+            progress.commit(deleted)
+        
+        deleted_company = self.company_repo.delete_by_id(company_id)
+        progress.commit(1)
+        
+        ledger = get_capacity_ledger()
+        if ledger:
+            ledger.refresh()
+        # Прогресс учитывает и пачки, удаленные предыдущими попытками
+        return {'company_id': company_id, 'deleted': deleted_company, 'deleted_rows': progress.done - 1}
+    
+    def import_companies_job(self, payload: Dict[str, Any], progress) -> Dict[str, Any]:
+        """Фоновый импорт компаний с точками поставки пачками по JOB_BATCH_SIZE компаний"""
+        items = payload['companies']
+        for start in range(progress.done, len(items), progress.batch_size):
+            batch = items[start:start + progress.batch_size]
+            self.company_repo.create_many(batch)
+            progress.commit(len(batch))
+        
+        return {
+            'imported_companies': len(items),
+            'imported_points': sum(len(item['energy_supply_points']) for item in items)
+        }
+    
+    def get_company_statistics(self, company_id: int) -> Optional[CompanyStatisticsOut]:
         """Получить статистику по компании"""
         company = self.company_repo.get_by_id(company_id)
         if not company:
@@ -1,5 +1,8 @@
-from typing import List, Dict, Any, Optional
+from datetime import date
+from typing import List, Dict, Any, Optional, Sequence, Union
 from repositories.energy_supply_point_repository import EnergySupplyPointRepository
+from services.capacity_ledger import get_capacity_ledger
+from schemas import EnergySupplyPointOut
 
 
 class EnergySupplyPointService:
@@ -8,26 +11,36 @@ class EnergySupplyPointService:
     def __init__(self):
         self.energy_point_repo = EnergySupplyPointRepository()
     
-    def get_all_points(self) -> List[Dict[str, Any]]:
-        """Получить все точки поставки"""
-        points = self.energy_point_repo.get_all()
-        return [self.energy_point_repo.to_dict(point) for point in points]
+    def get_all_points(self, includes: Sequence[str] = (), fields: Optional[Dict[str, List[str]]] = None) -> List[Union[EnergySupplyPointOut, Dict[str, Any]]]:
+        """Получить все точки поставки (с вложенными связями и выбранными полями)"""
+        if not includes and not fields:
+            points = self.energy_point_repo.get_all()
+            return [EnergySupplyPointOut.from_model(point) for point in points]
+        
+        options = self.energy_point_repo.loader_options(includes, fields or {})
+        points = self.energy_point_repo.get_all(options)
+        return [self.energy_point_repo.to_sparse_dict(point, includes, fields or {}) for point in points]
     
-    def get_point_by_id(self, point_id: int) -> Optional[Dict[str, Any]]:
+    def get_point_by_id(self, point_id: int, includes: Sequence[str] = (), fields: Optional[Dict[str, List[str]]] = None) -> Optional[Union[EnergySupplyPointOut, Dict[str, Any]]]:
         """Получить точку поставки по ID"""
-        point = self.energy_point_repo.get_by_id(point_id)
-        return self.energy_point_repo.to_dict(point) if point else None
+        if not includes and not fields:
+            point = self.energy_point_repo.get_by_id(point_id)
+            return EnergySupplyPointOut.from_model(point) if point else None
+        
+        options = self.energy_point_repo.loader_options(includes, fields or {})
+        point = self.energy_point_repo.get_by_id(point_id, options)
+        return self.energy_point_repo.to_sparse_dict(point, includes, fields or {}) if point else None
     
-    def create_point(self, name: str, company_id: int, connection_date: str, max_power_kw: float) -> Optional[Dict[str, Any]]:
+    def create_point(self, name: str, company_id: int, connection_date: date, max_power_kw: float) -> Optional[EnergySupplyPointOut]:
         """Создать новую точку поставки"""
         point = self.energy_point_repo.create(
             name, company_id, connection_date, max_power_kw
         )
         if not point:
             return None
-        return self.energy_point_repo.to_dict(point)
+        return EnergySupplyPointOut.from_model(point)
     
-    def update_point(self, point_id: int, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def update_point(self, point_id: int, data: Dict[str, Any]) -> Optional[EnergySupplyPointOut]:
         """Обновить точку поставки"""
         point = self.energy_point_repo.get_by_id(point_id)
         if not point:
@@ -37,7 +50,11 @@ class EnergySupplyPointService:
         if not updated_point:
             return None
         
-        return self.energy_point_repo.to_dict(updated_point)
+        ledger = get_capacity_ledger()
+        if ledger and 'max_power_kw' in data:
+            ledger.refresh([point_id])
+        
+        return EnergySupplyPointOut.from_model(updated_point)
     
     def delete_point(self, point_id: int) -> bool:
         """Удалить точку поставки"""
@@ -46,12 +63,19 @@ class EnergySupplyPointService:
             return False
         
         self.energy_point_repo.delete(point)
+        
+        ledger = get_capacity_ledger()
+        if ledger:
+            ledger.refresh([point_id])
         return True
     
-    def search_points_by_date(self, date_from: Optional[str], date_to: Optional[str]) -> List[Dict[str, Any]]:
+    def search_points_by_date(self, date_from: Optional[date], date_to: Optional[date]) -> List[EnergySupplyPointOut]:
         """Поиск точек поставки по дате"""
         return self.energy_point_repo.search_by_date_range(date_from, date_to)
     
     def rent_energy(self, point_id: int, company_name: str, quantity_power: float) -> Dict[str, Any]:
-        """Арендовать мощность"""
+        """Арендовать мощность (закрепленные горячие точки - через журнал в памяти)"""
+        ledger = get_capacity_ledger()
+        if ledger and ledger.owner(point_id) is not None:
+            return ledger.rent(point_id, company_name, quantity_power)
         return self.energy_point_repo.rent_energy(point_id, company_name, quantity_power)
@@ -0,0 +1,138 @@
+from typing import Iterable, Iterator, List, Optional, Sequence, BinaryIO
+from repositories.export_repository import ExportRepository, EXPORT_SPECS
+from error_handlers import APIError, ValidationError
+
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+class _ChunkSink:
+    """Файлоподобный буфер: писатели Arrow/Parquet пишут в него, генератор забирает готовые байты"""
+    
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+    
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self) -> None:
+        pass
+    
+    def close(self) -> None:
+        self.closed = True
+    
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _csv_field(value: Optional[str]) -> str:
+    """Поле CSV по правилам COPY ... CSV: NULL - пустое поле, пустая строка - в кавычках"""
+    if value is None:
+        return ''
+    if value == '' or any(char in value for char in ',"\r\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def _csv_line(values: Iterable[Optional[str]]) -> str:
+    return ','.join(_csv_field(value) for value in values) + '\n'
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise APIError('Arrow and Parquet export require the pyarrow package', status_code=501)
+    return pyarrow
+
+
+class ExportService:
+    """Сервис потоковой выгрузки таблиц в CSV, Arrow IPC и Parquet"""
+    
+    def __init__(self):
+        self.export_repo = ExportRepository()
+    
+    def validate(self, table: str, export_format: str, includes: Sequence[str]) -> List[str]:
+        """Проверить параметры выгрузки и вернуть нормализованный список присоединений"""
+        if table not in EXPORT_SPECS:
+            raise ValidationError(
+                f'Unknown table. Must be one of: {", ".join(EXPORT_SPECS)}',
+                payload={'valid_tables': list(EXPORT_SPECS)}
+            )
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(
+                f'Invalid format. Must be one of: {", ".join(EXPORT_FORMATS)}',
+                payload={'valid_formats': list(EXPORT_FORMATS)}
+            )
+        
+        valid_includes = list(EXPORT_SPECS[table]['includes'])
+        invalid = [name for name in includes if name not in valid_includes]
+        if invalid:
+            raise ValidationError(
+                f'Invalid include for {table}: {", ".join(invalid)}',
+                payload={'valid_includes': valid_includes}
+            )
+        # Сохраняем порядок, убираем повторы
+        return list(dict.fromkeys(includes))
+    
+    def stream(self, table: str, export_format: str, includes: Sequence[str], batch_size: int) -> Iterator[bytes]:
+        """Генератор байтов выгрузки; память ограничена одной пачкой строк"""
+        if export_format == 'csv':
+            return self._stream_csv(table, includes, batch_size)
+        return self._stream_arrow(table, export_format, includes, batch_size)
+    
+    def write(self, table: str, export_format: str, includes: Sequence[str], batch_size: int, output: BinaryIO) -> None:
+        """Записать выгрузку в файл (используется CLI)"""
+        if export_format == 'csv':
+            self.export_repo.copy_csv(table, includes, output)
+            return
+        for chunk in self._stream_arrow(table, export_format, includes, batch_size):
+            output.write(chunk)
+    
+    def _stream_csv(self, table: str, includes: Sequence[str], batch_size: int) -> Iterator[bytes]:
+        # Значения форматирует PostgreSQL (::text), кавычки - по правилам COPY,
+        # поэтому файл совпадает с выгрузкой CLI через COPY ... TO STDOUT
+        yield _csv_line(name for name, _, _ in self.export_repo.columns(table, includes)).encode()
+        for rows in self.export_repo.iter_batches(table, includes, batch_size, as_text=True):
+            yield ''.join(_csv_line(row) for row in rows).encode()
+    
+    def _stream_arrow(self, table: str, export_format: str, includes: Sequence[str], batch_size: int) -> Iterator[bytes]:
+        pa = _import_pyarrow()
+        types = {
+            'int32': pa.int32(),
+            'string': pa.string(),
+            'date': pa.date32(),
+            'timestamp': pa.timestamp('us'),
+            'decimal': pa.decimal128(14, 2),
+        }
+        schema = pa.schema([
+            (name, types[type_name]) for name, _, type_name in self.export_repo.columns(table, includes)
+        ])
+        
+        sink = _ChunkSink()
+        if export_format == 'arrow':
+            writer = pa.ipc.new_stream(sink, schema)
+        else:
+            writer = pa.parquet.ParquetWriter(sink, schema)
+        
+        try:
+            for rows in self.export_repo.iter_batches(table, includes, batch_size):
+                columns = zip(*rows)
+                batch = pa.RecordBatch.from_arrays(
+                    [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                    schema=schema
+                )
+                writer.write_batch(batch)
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
@@ -0,0 +1,188 @@
+import threading
+import time
+from datetime import date, timedelta
+from typing import List, Optional
+import numpy as np
+from flask import current_app
+from repositories.energy_supply_point_repository import EnergySupplyPointRepository
+from schemas import (
+    ForecastRequest, ForecastScenario, ForecastOut, ScenarioForecastOut,
+    PointForecastOut, CompanyForecastOut
+)
+
+
+# Итерации Ньютона для сценариев, где рост и новый спрос заданы одновременно
+NEWTON_ITERATIONS = 30
+NEWTON_TOLERANCE = 1e-9
+
+
+class CapacitySnapshot:
+    """Мощность всех точек в массивах NumPy; компании пронумерованы для bincount"""
+    
+    def __init__(self, point_ids: np.ndarray, company_ids: np.ndarray,
+                 max_power: np.ndarray, rented: np.ndarray):
+        self.point_ids = point_ids
+        self.company_ids = company_ids
+        self.max_power = max_power
+        self.rented = rented
+        self.companies, self.company_index = np.unique(company_ids, return_inverse=True)
+        self.loaded_at = time.monotonic()
+    
+    def select(self, company_ids: Optional[List[int]]) -> 'CapacitySnapshot':
+        """Срез по компаниям"""
+        if company_ids is None:
+            return self
+        mask = np.isin(self.company_ids, company_ids)
+        return CapacitySnapshot(
+            self.point_ids[mask], self.company_ids[mask], self.max_power[mask], self.rented[mask]
+        )
+
+
+def exhaustion_periods(max_power: np.ndarray, rented: np.ndarray,
+                       growth_rate: float, added_demand: float) -> np.ndarray:
+    """
+    Число периодов до исчерпания мощности каждой точки (inf - не исчерпается).
+    
+    Спрос через t периодов: rented * (1 + growth_rate) ** t + added_demand * t.
+    Для чистого роста и чистого нового спроса время считается аналитически,
+    для их сочетания - методом Ньютона от верхней оценки (функция выпуклая
+    и возрастающая, поэтому итерации сходятся монотонно).
+    """
+    headroom = max_power - rented
+    periods = np.full(max_power.shape, np.inf)
+    periods[headroom <= 0] = 0.0
+    active = headroom > 0
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if growth_rate > 0:
+            log_growth = np.log1p(growth_rate)
+            by_growth = np.where(rented > 0, np.log(max_power / rented) / log_growth, np.inf)
+        else:
+            by_growth = np.full(max_power.shape, np.inf)
+        by_demand = headroom / added_demand if added_demand > 0 else np.full(max_power.shape, np.inf)
+    
+    estimate = np.minimum(by_growth, by_demand)
+    periods[active] = estimate[active]
+    
+    mixed = active & (rented > 0) & np.isfinite(estimate)
+    if growth_rate > 0 and added_demand > 0 and mixed.any():
+        t = estimate[mixed]
+        base = rented[mixed]
+        target = max_power[mixed]
+        for _ in range(NEWTON_ITERATIONS):
+            grown = base * np.exp(log_growth * t)
+            step = (grown + added_demand * t - target) / (grown * log_growth + added_demand)
+            t -= step
+            if np.abs(step).max() < NEWTON_TOLERANCE:
+                break
+        periods[mixed] = np.maximum(t, 0.0)
+    return periods
+
+
+class ForecastService:
+    """Прогноз исчерпания мощности точек поставки по сценариям спроса"""
+    
+    def __init__(self):
+        self.energy_point_repo = EnergySupplyPointRepository()
+        self._snapshot: Optional[CapacitySnapshot] = None
+        self._lock = threading.Lock()
+    
+    def snapshot(self) -> CapacitySnapshot:
+        """Массивы мощности загружаются из БД один раз на FORECAST_SNAPSHOT_TTL_SECONDS"""
+        ttl = current_app.config['FORECAST_SNAPSHOT_TTL_SECONDS']
+        with self._lock:
+            if self._snapshot is None or time.monotonic() - self._snapshot.loaded_at > ttl:
+                self._snapshot = CapacitySnapshot(*self.energy_point_repo.load_capacity_arrays())
+            return self._snapshot
+    
+    def forecast(self, request: ForecastRequest) -> ForecastOut:
+        """Прогноз по всем сценариям запроса"""
+        snapshot = self.snapshot().select(request.company_ids)
+        start_date = request.start_date or date.today()
+        horizon_periods = request.horizon_days / request.period_days
+        
+        scenarios = [
+            self._simulate(snapshot, scenario, start_date, request.period_days, horizon_periods, request.limit)
+            for scenario in request.scenarios
+        ]
+        return ForecastOut(
+            start_date=start_date,
+            horizon_date=start_date + timedelta(days=request.horizon_days),
+            period_days=request.period_days,
+            points_total=len(snapshot.point_ids),
+            scenarios=scenarios
+        )
+    
+    def _simulate(self, snapshot: CapacitySnapshot, scenario: ForecastScenario, start_date: date,
+                  period_days: int, horizon_periods: float, limit: int) -> ScenarioForecastOut:
+        periods = exhaustion_periods(
+            snapshot.max_power, snapshot.rented, scenario.growth_rate, scenario.added_demand_kw
+        )
+        projected = (
+            snapshot.rented * (1 + scenario.growth_rate) ** horizon_periods
+            + scenario.added_demand_kw * horizon_periods
+        )
+        exhausted = periods <= horizon_periods
+        
+        def to_date(value: float) -> Optional[date]:
+            if value > horizon_periods:
+                return None
+            return start_date + timedelta(days=int(value * period_days))
+        
+        # Точки, исчерпывающие мощность раньше всех
+        exhausted_indexes = np.flatnonzero(exhausted)
+        if len(exhausted_indexes) > limit:
+            nearest = np.argpartition(periods[exhausted_indexes], limit)[:limit]
+            exhausted_indexes = exhausted_indexes[nearest]
+        exhausted_indexes = exhausted_indexes[np.argsort(periods[exhausted_indexes], kind='stable')]
+        points = [
+            PointForecastOut(
+                point_id=int(snapshot.point_ids[index]),
+                company_id=int(snapshot.company_ids[index]),
+                max_power_kw=float(snapshot.max_power[index]),
+                rented_kw=float(snapshot.rented[index]),
+                headroom_kw=round(float(snapshot.max_power[index] - snapshot.rented[index]), 2),
+                projected_rented_kw=round(float(projected[index]), 2),
+                projected_headroom_kw=round(float(snapshot.max_power[index] - projected[index]), 2),
+                exhaustion_date=to_date(periods[index])
+            )
+            for index in exhausted_indexes
+        ]
+        
+        # Агрегаты по компаниям: суммы через bincount, раннее исчерпание через minimum.at
+        company_count = len(snapshot.companies)
+        index = snapshot.company_index
+        company_points = np.bincount(index, minlength=company_count)
+        company_max = np.bincount(index, weights=snapshot.max_power, minlength=company_count)
+        company_rented = np.bincount(index, weights=snapshot.rented, minlength=company_count)
+        company_projected = np.bincount(index, weights=projected, minlength=company_count)
+        company_exhausted = np.bincount(index, weights=exhausted, minlength=company_count).astype(np.int64)
+        company_first = np.full(company_count, np.inf)
+        np.minimum.at(company_first, index, periods)
+        
+        company_headroom = company_max - company_projected
+        order = np.lexsort((company_headroom, company_first))[:limit]
+        companies = [
+            CompanyForecastOut(
+                company_id=int(snapshot.companies[position]),
+                points=int(company_points[position]),
+                max_power_kw=round(float(company_max[position]), 2),
+                rented_kw=round(float(company_rented[position]), 2),
+                projected_rented_kw=round(float(company_projected[position]), 2),
+                projected_headroom_kw=round(float(company_headroom[position]), 2),
+                points_exhausted=int(company_exhausted[position]),
+                first_exhaustion_date=to_date(company_first[position])
+            )
+            for position in order
+        ]
+        
+        first = float(periods.min()) if len(periods) else np.inf
+        return ScenarioForecastOut(
+            name=scenario.name,
+            growth_rate=scenario.growth_rate,
+            added_demand_kw=scenario.added_demand_kw,
+            points_exhausted=int(exhausted.sum()),
+            first_exhaustion_date=to_date(first),
+            points=points,
+            companies=companies
+        )
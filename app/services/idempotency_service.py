@@ -0,0 +1,94 @@
+import hashlib
+import random
+import time
+from typing import Callable
+from flask import current_app, jsonify, make_response, Response
+from repositories.idempotency_key_repository import IdempotencyKeyRepository
+from deadlines import without_deadline
+from error_handlers import ValidationError, ConflictError
+
+
+MAX_KEY_LENGTH = 200
+# Доля запросов, попутно удаляющих истекшие ключи
+PURGE_PROBABILITY = 0.01
+
+
+class IdempotencyService:
+    """Сервис повторного воспроизведения ответов по Idempotency-Key"""
+    
+    def __init__(self):
+        self.idempotency_repo = IdempotencyKeyRepository()
+    
+    @staticmethod
+    def request_hash(method: str, path: str, body: bytes) -> str:
+        """Отпечаток запроса, чтобы ключ нельзя было переиспользовать с другими данными"""
+        digest = hashlib.sha256()
+        digest.update(method.encode())
+        digest.update(b'\0')
+        digest.update(path.encode())
+        digest.update(b'\0')
+        digest.update(body or b'')
+        return digest.hexdigest()
+    
+    def execute(self, scope: str, key: str, request_hash: str, handler: Callable[[], object]) -> Response:
+        """
+        Выполнить запрос не более одного раза для данного ключа.
+        
+        Сохраненный ответ воспроизводится без вызова обработчика и без блокировок.
+        Параллельный дубликат ждет завершения выполняющегося запроса.
+        """
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValidationError(f'Idempotency-Key must be 1..{MAX_KEY_LENGTH} characters long')
+        
+        scoped_key = f'{scope}:{key}'
+        ttl = current_app.config['IDEMPOTENCY_TTL_SECONDS']
+        lease = current_app.config['IDEMPOTENCY_LEASE_SECONDS']
+        deadline = time.monotonic() + current_app.config['IDEMPOTENCY_WAIT_SECONDS']
+        delay = 0.05
+        
+        while True:
+            record = self.idempotency_repo.get_active(scoped_key)
+            if record:
+                if record.request_hash != request_hash:
+                    raise ConflictError('Idempotency-Key was already used with a different request')
+                if record.is_completed:
+                    return self._replay(record.status_code, record.response_body)
+            if (record is None or record.is_abandoned) and \
+                    self.idempotency_repo.try_acquire(scoped_key, request_hash, ttl, lease):
+                if random.random() < PURGE_PROBABILITY:
+                    self.idempotency_repo.purge_expired()
+                break
+            
+            if time.monotonic() >= deadline:
+                raise ConflictError('A request with this Idempotency-Key is still in progress')
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+        
+        # Учет ключа не ограничен дедлайном запроса: после statement_timeout или
+        # lock_timeout ключ все равно освобождается, и повтор выполнится заново
+        try:
+            response = make_response(handler())
+        except Exception:
+            # Ошибка не сохраняется: повтор с тем же ключом выполнится заново
+            with without_deadline():
+                self.idempotency_repo.release(scoped_key)
+            raise
+        
+        with without_deadline():
+            if response.status_code >= 500 or not response.is_json:
+                self.idempotency_repo.release(scoped_key)
+            else:
+                self.idempotency_repo.complete(scoped_key, response.status_code, response.get_json())
+        response.headers['Idempotent-Replayed'] = 'false'
+        return response
+    
+    def purge_expired(self) -> int:
+        """Удалить истекшие ключи"""
+        return self.idempotency_repo.purge_expired()
+    
+    @staticmethod
+    def _replay(status_code: int, body) -> Response:
+        response = jsonify(body)
+        response.status_code = status_code
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
@@ -0,0 +1,185 @@
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from typing import Optional
+from flask import Flask, current_app
+from error_handlers import APIError
+from models import db
+from repositories.job_repository import JobRepository
+from services.job_service import JobService
+
+
+logger = logging.getLogger(__name__)
+
+# Как часто воркеры удаляют завершенные задачи старше JOB_RETENTION_HOURS
+PURGE_INTERVAL_SECONDS = 600
+
+
+class JobLeaseLost(Exception):
+    """Аренда задачи истекла, и ее забрал другой воркер"""
+
+
+class JobProgress:
+    """Прогресс выполняемой задачи; каждая фиксация продлевает аренду"""
+    
+    def __init__(self, job_repo: JobRepository, job_id: int, worker_id: str,
+                 done: int, total: Optional[int], lease_seconds: float, batch_size: int):
+        self.job_repo = job_repo
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.done = done
+        self.total = total
+        self.lease_seconds = lease_seconds
+        self.batch_size = batch_size
+    
+    def commit(self, advance: int = 0, total: Optional[int] = None) -> None:
+        """Зафиксировать пачку изменений обработчика вместе с прогрессом"""
+        done = self.done + advance
+        if not self.job_repo.set_progress(self.job_id, self.worker_id, done, total, self.lease_seconds):
+            db.session.rollback()
+            raise JobLeaseLost(f'Job {self.job_id} lease was lost')
+        db.session.commit()
+        self.done = done
+        if total is not None:
+            self.total = total
+
+
+class JobRunner:
+    """
+    Пул воркеров фоновых задач в процессе API.
+    
+    Воркеры забирают задачи из таблицы jobs через SKIP LOCKED, поэтому
+    несколько процессов обслуживают одну очередь без внешнего брокера.
+    Упавшая задача повторяется с экспоненциальной задержкой.
+    """
+    
+    def __init__(self, app: Flask):
+        config = app.config
+        self.app = app
+        self.workers = config['JOB_WORKERS']
+        self.poll_interval = config['JOB_POLL_INTERVAL_SECONDS']
+        self.lease_seconds = config['JOB_LEASE_SECONDS']
+        self.retry_base = config['JOB_RETRY_BASE_SECONDS']
+        self.retry_max = config['JOB_RETRY_MAX_SECONDS']
+        self.batch_size = config['JOB_BATCH_SIZE']
+        self.retention_hours = config['JOB_RETENTION_HOURS']
+        self.job_repo = JobRepository()
+        self.job_service = JobService()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wake = threading.Condition()
+        self._stopped = threading.Event()
+        self._next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+    
+    def start(self, workers: Optional[int] = None) -> None:
+        """Запустить воркеров, если они еще не запущены"""
+        workers = self.workers if workers is None else workers
+        with self._lock:
+            if self._threads or workers <= 0:
+                return
+            self._stopped.clear()
+            for number in range(workers):
+                thread = threading.Thread(
+                    target=self._work, args=(number,), name=f'job-worker-{number}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+    
+    def ensure_started(self) -> None:
+        """Хук before_request: воркеры стартуют в процессах, которые обслуживают запросы"""
+        if not self._threads:
+            self.start()
+    
+    def stop(self) -> None:
+        self._stopped.set()
+        self.wake()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+    
+    def wake(self) -> None:
+        """Разбудить воркеров этого процесса после постановки задачи"""
+        with self._wake:
+            self._wake.notify_all()
+    
+    def retry_delay(self, attempts: int) -> float:
+        """Экспоненциальная задержка перед повтором со случайным разбросом"""
+        delay = min(self.retry_base * 2 ** (attempts - 1), self.retry_max)
+        return delay * random.uniform(0.5, 1.0)
+    
+    def _work(self, number: int) -> None:
+        worker_id = f'{socket.gethostname()}:{os.getpid()}:{number}'
+        while not self._stopped.is_set():
+            with self.app.app_context():
+                try:
+                    if self.run_one(worker_id):
+                        continue
+                    if number == 0 and time.monotonic() >= self._next_purge:
+                        self._next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+                        self.job_repo.purge_finished(self.retention_hours)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Job worker %s failed to poll the queue', worker_id)
+            with self._wake:
+                self._wake.wait(self.poll_interval)
+    
+    def run_one(self, worker_id: str) -> bool:
+        """Выполнить одну готовую задачу; False - очередь пуста"""
+        job = self.job_repo.claim(worker_id, self.lease_seconds)
+        if job is None:
+            return False
+        
+        job_id, kind, payload = job.id, job.kind, job.payload
+        attempts, max_attempts = job.attempts, job.max_attempts
+        if attempts > max_attempts:
+            # Задачу забрали после истечения аренды упавшего воркера
+            self.job_repo.fail(job_id, worker_id, 'Worker lost while running the job', None)
+            return True
+        
+        progress = JobProgress(
+            self.job_repo, job_id, worker_id, job.progress_done, job.progress_total,
+            self.lease_seconds, self.batch_size
+        )
+        logger.info('Job %s (%s) started, attempt %d', job_id, kind, attempts)
+        try:
+            result = self.job_service.run(kind, payload, progress)
+        except JobLeaseLost:
+            logger.warning('Job %s lease lost, leaving it to the new owner', job_id)
+            return True
+        except Exception as error:
+            db.session.rollback()
+            message = error.message if isinstance(error, APIError) else f'{type(error).__name__}: {error}'
+            # Ошибки валидации не исчезнут при повторе
+            retryable = not isinstance(error, APIError) and attempts < max_attempts
+            retry_in = self.retry_delay(attempts) if retryable else None
+            self.job_repo.fail(job_id, worker_id, message, retry_in)
+            logger.warning('Job %s (%s) failed: %s', job_id, kind, message,
+                           exc_info=not isinstance(error, APIError))
+            return True
+        
+        self.job_repo.complete(job_id, worker_id, result)
+        logger.info('Job %s (%s) succeeded', job_id, kind)
+        return True
+    
+    def run_forever(self, workers: Optional[int] = None) -> None:
+        """Обслуживать очередь в текущем процессе до остановки (flask run-jobs)"""
+        self.start(workers)
+        try:
+            while not self._stopped.wait(1):
+                pass
+        except KeyboardInterrupt:
+            self.stop()
+
+
+def get_job_runner() -> Optional[JobRunner]:
+    return current_app.extensions.get('job_runner')
+
+
+def register_job_runner(app: Flask):
+    """Подключение пула воркеров; потоки запускаются при первом запросе к процессу"""
+    runner = JobRunner(app)
+    app.extensions['job_runner'] = runner
+    app.before_request(runner.ensure_started)
@@ -0,0 +1,49 @@
+from typing import Any, Dict, List, Optional
+from flask import current_app
+from error_handlers import ValidationError
+from models import Job
+from repositories.job_repository import JobRepository
+from services.company_service import CompanyService
+
+
+class JobService:
+    """Постановка фоновых задач и их обработчики"""
+    
+    def __init__(self):
+        self.job_repo = JobRepository()
+        self.company_service = CompanyService()
+        # Обработчик получает payload и JobProgress, возвращает результат задачи
+        self.handlers = {
+            'delete_company': self.company_service.delete_company_job,
+            'import_companies': self.company_service.import_companies_job
+        }
+    
+    def enqueue(self, kind: str, payload: Dict[str, Any], total: Optional[int] = None) -> Job:
+        """Поставить задачу в очередь и разбудить воркеров текущего процесса"""
+        if kind not in self.handlers:
+            raise ValidationError(f'Unknown job kind: {kind}')
+        job = self.job_repo.enqueue(kind, payload, current_app.config['JOB_MAX_ATTEMPTS'], total)
+        runner = current_app.extensions.get('job_runner')
+        if runner:
+            runner.wake()
+        return job
+    
+    def enqueue_company_delete(self, company_id: int) -> Optional[Job]:
+        """Удалить компанию в фоне (None - компания не найдена)"""
+        if not self.company_service.company_repo.get_by_id(company_id):
+            return None
+        return self.enqueue('delete_company', {'company_id': company_id})
+    
+    def enqueue_company_import(self, companies: List[Dict[str, Any]]) -> Job:
+        """Импортировать компании с точками поставки в фоне"""
+        return self.enqueue('import_companies', {'companies': companies}, total=len(companies))
+    
+    def get_job(self, job_id: int) -> Optional[Job]:
+        return self.job_repo.get_fresh(job_id)
+    
+    def run(self, kind: str, payload: Dict[str, Any], progress) -> Optional[Dict[str, Any]]:
+        """Выполнить задачу обработчиком ее типа"""
+        handler = self.handlers.get(kind)
+        if handler is None:
+            raise ValidationError(f'Unknown job kind: {kind}')
+        return handler(payload, progress)
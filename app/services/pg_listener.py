@@ -0,0 +1,129 @@
+import logging
+import select
+import threading
+import time
+from typing import Callable, Optional
+from flask import Flask
+from models import db
+
+
+logger = logging.getLogger(__name__)
+
+
+class PgListener:
+    """
+    Фоновый слушатель канала PostgreSQL LISTEN/NOTIFY.
+    
+    Держит одно выделенное соединение на процесс (вне пула) и вызывает
+    on_notify для каждого уведомления. После переподключения вызывается
+    on_reconnect: уведомления, пришедшие в разрыве, потеряны.
+    on_wake вызывается после подключения, после каждой пачки уведомлений
+    и не реже раза в wake_interval секунд.
+    """
+    
+    def __init__(self, channel: str, on_notify: Optional[Callable[[str], None]] = None,
+                 on_reconnect: Optional[Callable[[], None]] = None,
+                 on_idle: Optional[Callable[[], None]] = None, idle_interval: float = 60.0,
+                 on_wake: Optional[Callable[[], None]] = None, wake_interval: float = 1.0):
+        self.channel = channel
+        self.on_notify = on_notify
+        self.on_reconnect = on_reconnect
+        self.on_idle = on_idle
+        self.idle_interval = idle_interval
+        self.on_wake = on_wake
+        self.wake_interval = wake_interval
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+    
+    def start(self, app: Flask) -> None:
+        """Запустить поток слушателя, если он еще не запущен"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(app,), name=f'pg-listener-{self.channel}', daemon=True
+            )
+            self._thread.start()
+    
+    def ensure_started(self, app: Flask) -> None:
+        """Хук before_request: поток стартует в процессе, который обслуживает запросы"""
+        if not (self._thread and self._thread.is_alive()):
+            self.start(app)
+    
+    def stop(self) -> None:
+        self._stopped.set()
+    
+    def _connect(self, app: Flask):
+        with app.app_context():
+            connection = db.engine.raw_connection()
+        # Соединение не возвращается в пул: оно занято LISTEN на все время работы
+        connection.detach()
+        driver_connection = connection.driver_connection
+        driver_connection.autocommit = True
+        with driver_connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {self.channel}')
+        return driver_connection
+    
+    def _run(self, app: Flask) -> None:
+        backoff = 1.0
+        first_connect = True
+        while not self._stopped.is_set():
+            try:
+                connection = self._connect(app)
+            except Exception:
+                logger.exception('LISTEN %s: connection failed', self.channel)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+            
+            backoff = 1.0
+            if not first_connect and self.on_reconnect:
+                self.on_reconnect()
+            first_connect = False
+            
+            try:
+                self._listen(connection)
+            except Exception:
+                logger.exception('LISTEN %s: connection lost', self.channel)
+            finally:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+    
+    def _wake(self) -> None:
+        try:
+            self.on_wake()
+        except Exception:
+            logger.exception('LISTEN %s: wake callback failed', self.channel)
+    
+    def _listen(self, connection) -> None:
+        next_idle = time.monotonic() + self.idle_interval
+        next_wake = time.monotonic() + self.wake_interval
+        if self.on_wake:
+            self._wake()
+        while not self._stopped.is_set():
+            deadline = min(next_idle, next_wake) if self.on_wake else next_idle
+            timeout = max(0.0, deadline - time.monotonic())
+            notified = False
+            if select.select([connection], [], [], timeout) != ([], [], []):
+                connection.poll()
+                while connection.notifies:
+                    notify = connection.notifies.pop(0)
+                    notified = True
+                    if self.on_notify:
+                        self.on_notify(notify.payload)
+            
+            if self.on_wake and (notified or time.monotonic() >= next_wake):
+                next_wake = time.monotonic() + self.wake_interval
+                self._wake()
+            
+            if time.monotonic() >= next_idle:
+                next_idle = time.monotonic() + self.idle_interval
+                if self.on_idle:
+                    try:
+                        self.on_idle()
+                    except Exception:
+                        logger.exception('LISTEN %s: idle callback failed', self.channel)
@@ -0,0 +1,3 @@
+-- Занятая мощность точки, как в rent_energy
+\set point random(:first_point, :last_point)
+SELECT COALESCE(SUM(quantity_power), 0) FROM company_clients WHERE energy_supply_point_id = :point;
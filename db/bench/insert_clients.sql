@@ -0,0 +1,4 @@
+-- Вставка аренды без проверки мощности
+\set point random(:first_point, :last_point)
+INSERT INTO company_clients (energy_supply_point_id, company_name, quantity_power)
+VALUES (:point, 'bench', 0.01);
@@ -0,0 +1,3 @@
+-- Аренда через хранимую функцию: блокировка точки, сумма аренд и вставка
+\set point random(:first_point, :last_point)
+SELECT * FROM rent_energy(:point, 'bench', 0.01);
@@ -0,0 +1,29 @@
+-- Тестовые данные для нагрузочных тестов: точки поставки и аренды в масштабе.
+--   psql -v ON_ERROR_STOP=1 -v points=100000 -v clients=50000000 -f db/bench/seed.sql
+-- Триггеры (лента изменений) на время загрузки отключены, нужны права суперпользователя.
+
+SET session_replication_role = replica;
+
+INSERT INTO companies (name, registration_date, status)
+VALUES ('bench', CURRENT_DATE, 'active')
+RETURNING id AS company_id \gset
+
+INSERT INTO energy_supply_points (name, company_id, connection_date, max_power_kw)
+SELECT 'bench-' || g, :company_id, CURRENT_DATE, 99999999.99
+FROM generate_series(1, :points) g;
+
+SELECT MIN(id) AS first_point FROM energy_supply_points WHERE company_id = :company_id \gset
+
+-- Аренды равномерно по точкам, пачками по миллиону строк
+SELECT format(
+    'INSERT INTO company_clients (energy_supply_point_id, company_name, quantity_power) '
+    'SELECT %s + g %% %s, ''Клиент '' || g %% 100000, 1 '
+    'FROM generate_series(%s, %s) g',
+    :first_point, :points, batch, LEAST(batch + 999999, :clients)
+)
+FROM generate_series(1, :clients, 1000000) batch \gexec
+
+SET session_replication_role = DEFAULT;
+
+VACUUM ANALYZE energy_supply_points;
+VACUUM ANALYZE company_clients;
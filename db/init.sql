@@ -17,14 +17,149 @@ CREATE TABLE IF NOT EXISTS energy_supply_points (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Аренды секционированы по хешу точки поставки: вставки, VACUUM и сумма аренд точки
+-- работают с одной секцией. Первичный ключ секционированной таблицы обязан содержать
+-- ключ секционирования, id по-прежнему уникален за счет последовательности.
+-- Перевод существующей таблицы без простоя: db/migrations/001_partition_company_clients.sql
 CREATE TABLE IF NOT EXISTS company_clients (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     energy_supply_point_id INTEGER NOT NULL REFERENCES energy_supply_points(id) ON DELETE CASCADE,
     company_name VARCHAR(255) NOT NULL,
     quantity_power DECIMAL(10, 2) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, energy_supply_point_id)
+) PARTITION BY HASH (energy_supply_point_id);
+
+DO $$
+BEGIN
+    FOR i IN 0..15 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS company_clients_p%s PARTITION OF company_clients '
+            'FOR VALUES WITH (MODULUS 16, REMAINDER %s)', i, i
+        );
+    END LOOP;
+END $$;
+
+-- Занятая мощность точки считается index-only scan по одной секции
+CREATE INDEX IF NOT EXISTS idx_company_clients_point_power
+    ON company_clients (energy_supply_point_id) INCLUDE (quantity_power);
+
+-- GROUP BY energy_supply_point_id (выгрузка, прогноз) агрегируется по секциям отдельно
+DO $$
+BEGIN
+    EXECUTE format('ALTER DATABASE %I SET enable_partitionwise_aggregate = on', current_database());
+END $$;
+
+-- Поиск аренд по имени клиента (/api/company-clients/by-customer) без учета регистра:
+-- префиксный LIKE - по btree с text_pattern_ops, нечеткий поиск (%) - по триграммам
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_company_clients_name_prefix
+    ON company_clients (lower(company_name) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_company_clients_name_trgm
+    ON company_clients USING gin (lower(company_name) gin_trgm_ops);
+
+-- Результаты запросов с заголовком Idempotency-Key (status_code IS NULL - запрос выполняется).
+-- locked_until - аренда выполняющегося запроса: после нее ключ упавшего процесса занимает повтор
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key VARCHAR(255) PRIMARY KEY,
+    request_hash CHAR(64) NOT NULL,
+    status_code SMALLINT,
+    response_body JSONB,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+    locked_until TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys (expires_at);
+
+-- Журнал аренд горячих точек: последняя запись каждого воркера, перенесенная в company_clients
+CREATE TABLE IF NOT EXISTS capacity_ledger_checkpoints (
+    worker_index INTEGER PRIMARY KEY,
+    last_seq BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Фоновые задачи: queued -> running -> succeeded | failed (повтор - снова queued с новым run_at).
+-- locked_until - аренда задачи воркером; просроченная задача упавшего воркера забирается повторно.
+CREATE TABLE IF NOT EXISTS jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(64) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    status VARCHAR(16) NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    progress_done INTEGER NOT NULL DEFAULT 0,
+    progress_total INTEGER,
+    result JSONB,
+    error TEXT,
+    run_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_by VARCHAR(128),
+    locked_until TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_queued_run_at ON jobs (run_at) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_jobs_running_locked_until ON jobs (locked_until) WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS idx_jobs_finished_at ON jobs (finished_at) WHERE finished_at IS NOT NULL;
+
+-- Журнал изменений для ленты /api/changes/stream. Курсор подписчика - (txid, id):
+-- id выдается при вставке, а не при фиксации, поэтому один id не задает порядок
+CREATE TABLE IF NOT EXISTS change_events (
+    id BIGSERIAL PRIMARY KEY,
+    txid BIGINT NOT NULL DEFAULT pg_current_xact_id()::text::bigint,
+    table_name VARCHAR(64) NOT NULL,
+    operation VARCHAR(8) NOT NULL,
+    row_id INTEGER NOT NULL,
+    data JSONB,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX IF NOT EXISTS idx_change_events_created_at ON change_events (created_at);
+CREATE INDEX IF NOT EXISTS idx_change_events_cursor ON change_events (txid, id);
+
+-- Записывает изменение в журнал и уведомляет слушателей канала energy_changes.
+-- Имя таблицы передается аргументом триггера: для секционированных таблиц
+-- TG_TABLE_NAME содержит имя секции.
+CREATE OR REPLACE FUNCTION notify_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_row RECORD;
+    v_data JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        v_row := OLD;
+        v_data := NULL;
+    ELSE
+        v_row := NEW;
+        v_data := to_jsonb(NEW);
+    END IF;
+    
+    INSERT INTO change_events (table_name, operation, row_id, data)
+    VALUES (TG_ARGV[0], TG_OP, v_row.id, v_data);
+    
+    -- Уведомление доставляется только после фиксации и только будит слушателей:
+    -- события читаются из change_events. Одинаковые уведомления транзакции сливаются в одно
+    PERFORM pg_notify('energy_changes', '');
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER companies_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON companies
+    FOR EACH ROW EXECUTE FUNCTION notify_change('companies');
+
+CREATE OR REPLACE TRIGGER energy_supply_points_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON energy_supply_points
+    FOR EACH ROW EXECUTE FUNCTION notify_change('energy_supply_points');
+
+CREATE OR REPLACE TRIGGER company_clients_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON company_clients
+    FOR EACH ROW EXECUTE FUNCTION notify_change('company_clients');
+
 -- Возвращает статистику по компании
 CREATE OR REPLACE FUNCTION get_company_statistics(p_company_id INTEGER)
 RETURNS TABLE (
@@ -56,10 +191,12 @@ DECLARE
     v_used_power DECIMAL;
     v_available_power DECIMAL;
 BEGIN
-    -- Получаем максимальную мощность точки поставки
+    -- Получаем максимальную мощность точки поставки; блокировка строки точки
+    -- сериализует параллельные аренды одной точки до конца транзакции
     SELECT max_power_kw INTO v_max_power
     FROM energy_supply_points
-    WHERE id = p_energy_supply_point_id;
+    WHERE id = p_energy_supply_point_id
+    FOR UPDATE;
     
     -- Проверяем существование точки поставки
     IF v_max_power IS NULL THEN
@@ -67,7 +204,7 @@ BEGIN
         RETURN;
     END IF;
     
-    -- Получаем уже использованную мощность
+    -- Получаем уже использованную мощность (только секция этой точки)
     SELECT COALESCE(SUM(quantity_power), 0) INTO v_used_power
     FROM company_clients
     WHERE energy_supply_point_id = p_energy_supply_point_id;
@@ -117,7 +254,7 @@ BEGIN
     WHERE 
         (p_connection_date_from IS NULL OR esp.connection_date >= p_connection_date_from)
         AND (p_connection_date_to IS NULL OR esp.connection_date <= p_connection_date_to)
-    ORDER BY esp.connection_date;
+    ORDER BY esp.connection_date, esp.id;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -0,0 +1,194 @@
+-- Перевод company_clients в секционированную по хешу energy_supply_point_id таблицу без простоя.
+-- Нужен только для баз, созданных до секционирования в db/init.sql.
+--
+-- Запуск вне транзакции (CALL фиксирует каждую пачку отдельно):
+--   psql -v ON_ERROR_STOP=1 -f db/migrations/001_partition_company_clients.sql
+--
+-- 1. Рядом создается секционированная company_clients_partitioned.
+-- 2. Триггер на старой таблице повторяет в новой каждую вставку, изменение и удаление.
+-- 3. Существующие строки копируются пачками по id; строки пачки блокируются FOR SHARE,
+--    поэтому параллельное удаление дождется копии и удалит ее через триггер.
+-- 4. Короткая транзакция с ACCESS EXCLUSIVE меняет таблицы местами. Если блокировку
+--    не удалось получить за lock_timeout, шаг 4 можно просто запустить повторно.
+-- Старая таблица остается под именем company_clients_legacy до ручного DROP.
+
+-- 1. Новая таблица с той же последовательностью id
+CREATE TABLE IF NOT EXISTS company_clients_partitioned (
+    id INTEGER NOT NULL DEFAULT nextval('company_clients_id_seq'),
+    energy_supply_point_id INTEGER NOT NULL REFERENCES energy_supply_points(id) ON DELETE CASCADE,
+    company_name VARCHAR(255) NOT NULL,
+    quantity_power DECIMAL(10, 2) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT company_clients_partitioned_pkey PRIMARY KEY (id, energy_supply_point_id)
+) PARTITION BY HASH (energy_supply_point_id);
+
+DO $$
+BEGIN
+    FOR i IN 0..15 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS company_clients_p%s PARTITION OF company_clients_partitioned '
+            'FOR VALUES WITH (MODULUS 16, REMAINDER %s)', i, i
+        );
+    END LOOP;
+END $$;
+
+-- Индексы строятся на пустой таблице, чтобы не держать блокировки на живых данных
+CREATE INDEX IF NOT EXISTS idx_company_clients_partitioned_point_power
+    ON company_clients_partitioned (energy_supply_point_id) INCLUDE (quantity_power);
+CREATE INDEX IF NOT EXISTS idx_company_clients_partitioned_name_prefix
+    ON company_clients_partitioned (lower(company_name) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_company_clients_partitioned_name_trgm
+    ON company_clients_partitioned USING gin (lower(company_name) gin_trgm_ops);
+
+-- 2. Зеркалирование изменений старой таблицы
+CREATE OR REPLACE FUNCTION company_clients_mirror()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM company_clients_partitioned
+        WHERE id = OLD.id AND energy_supply_point_id = OLD.energy_supply_point_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO company_clients_partitioned
+            (id, energy_supply_point_id, company_name, quantity_power, created_at)
+        VALUES (NEW.id, NEW.energy_supply_point_id, NEW.company_name, NEW.quantity_power, NEW.created_at)
+        ON CONFLICT (id, energy_supply_point_id) DO UPDATE SET
+            company_name = EXCLUDED.company_name,
+            quantity_power = EXCLUDED.quantity_power,
+            created_at = EXCLUDED.created_at;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER company_clients_mirror
+    AFTER INSERT OR UPDATE OR DELETE ON company_clients
+    FOR EACH ROW EXECUTE FUNCTION company_clients_mirror();
+
+-- 3. Перенос существующих строк пачками, каждая пачка - отдельная транзакция
+CREATE OR REPLACE PROCEDURE company_clients_backfill(p_batch_size INTEGER DEFAULT 10000,
+                                                     p_pause_seconds DOUBLE PRECISION DEFAULT 0)
+AS $$
+DECLARE
+    v_last_id INTEGER := 0;
+    v_max_id INTEGER;
+BEGIN
+    -- Строки с большим id вставлены уже после создания триггера
+    SELECT COALESCE(MAX(id), 0) INTO v_max_id FROM company_clients;
+    
+    WHILE v_last_id < v_max_id LOOP
+        WITH batch AS (
+            SELECT id, energy_supply_point_id, company_name, quantity_power, created_at
+            FROM company_clients
+            WHERE id > v_last_id AND id <= v_max_id
+            ORDER BY id
+            LIMIT p_batch_size
+            FOR SHARE
+        ), copied AS (
+            INSERT INTO company_clients_partitioned
+                (id, energy_supply_point_id, company_name, quantity_power, created_at)
+            SELECT id, energy_supply_point_id, company_name, quantity_power, created_at FROM batch
+            ON CONFLICT (id, energy_supply_point_id) DO NOTHING
+        )
+        SELECT COALESCE(MAX(id), v_max_id) INTO v_last_id FROM batch;
+        
+        COMMIT;
+        RAISE NOTICE 'company_clients backfill: % / %', v_last_id, v_max_id;
+        IF p_pause_seconds > 0 THEN
+            PERFORM pg_sleep(p_pause_seconds);
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+CALL company_clients_backfill(10000);
+
+-- Контроль перед переключением (расхождение допустимо только на строки, измененные в эти секунды)
+SELECT
+    (SELECT COUNT(*) FROM company_clients) AS legacy_rows,
+    (SELECT COUNT(*) FROM company_clients_partitioned) AS partitioned_rows;
+
+-- 4. Переключение
+BEGIN;
+SET LOCAL lock_timeout = '5s';
+LOCK TABLE company_clients IN ACCESS EXCLUSIVE MODE;
+
+DROP TRIGGER company_clients_mirror ON company_clients;
+DROP TRIGGER IF EXISTS company_clients_notify_change ON company_clients;
+
+ALTER TABLE company_clients RENAME TO company_clients_legacy;
+ALTER INDEX company_clients_pkey RENAME TO company_clients_legacy_pkey;
+ALTER INDEX IF EXISTS idx_company_clients_name_prefix RENAME TO idx_company_clients_legacy_name_prefix;
+ALTER INDEX IF EXISTS idx_company_clients_name_trgm RENAME TO idx_company_clients_legacy_name_trgm;
+
+ALTER TABLE company_clients_partitioned RENAME TO company_clients;
+ALTER INDEX company_clients_partitioned_pkey RENAME TO company_clients_pkey;
+ALTER INDEX idx_company_clients_partitioned_point_power RENAME TO idx_company_clients_point_power;
+ALTER INDEX idx_company_clients_partitioned_name_prefix RENAME TO idx_company_clients_name_prefix;
+ALTER INDEX idx_company_clients_partitioned_name_trgm RENAME TO idx_company_clients_name_trgm;
+ALTER TABLE company_clients RENAME CONSTRAINT company_clients_partitioned_energy_supply_point_id_fkey
+    TO company_clients_energy_supply_point_id_fkey;
+
+-- Иначе последовательность удалится вместе со старой таблицей
+ALTER SEQUENCE company_clients_id_seq OWNED BY company_clients.id;
+
+CREATE OR REPLACE TRIGGER company_clients_notify_change
+    AFTER INSERT OR UPDATE OR DELETE ON company_clients
+    FOR EACH ROW EXECUTE FUNCTION notify_change('company_clients');
+COMMIT;
+
+DROP PROCEDURE company_clients_backfill(INTEGER, DOUBLE PRECISION);
+DROP FUNCTION company_clients_mirror();
+
+DO $$
+BEGIN
+    EXECUTE format('ALTER DATABASE %I SET enable_partitionwise_aggregate = on', current_database());
+END $$;
+
+-- rent_energy блокирует строку точки (см. db/init.sql)
+CREATE OR REPLACE FUNCTION rent_energy(
+    p_energy_supply_point_id INTEGER,
+    p_company_name VARCHAR,
+    p_quantity_power DECIMAL
+)
+RETURNS TABLE (
+    success BOOLEAN,
+    message TEXT
+) AS $$
+DECLARE
+    v_max_power DECIMAL;
+    v_used_power DECIMAL;
+    v_available_power DECIMAL;
+BEGIN
+    SELECT max_power_kw INTO v_max_power
+    FROM energy_supply_points
+    WHERE id = p_energy_supply_point_id
+    FOR UPDATE;
+    
+    IF v_max_power IS NULL THEN
+        RETURN QUERY SELECT FALSE, 'Energy supply point not found';
+        RETURN;
+    END IF;
+    
+    SELECT COALESCE(SUM(quantity_power), 0) INTO v_used_power
+    FROM company_clients
+    WHERE energy_supply_point_id = p_energy_supply_point_id;
+    
+    v_available_power := v_max_power - v_used_power;
+    
+    IF v_available_power < p_quantity_power THEN
+        RETURN QUERY SELECT
+            FALSE,
+            'Insufficient power. Available: ' || v_available_power::TEXT || ' kW, Requested: ' || p_quantity_power::TEXT || ' kW';
+        RETURN;
+    END IF;
+    
+    INSERT INTO company_clients (energy_supply_point_id, company_name, quantity_power)
+    VALUES (p_energy_supply_point_id, p_company_name, p_quantity_power);
+    
+    RETURN QUERY SELECT TRUE, 'Energy rented successfully';
+END;
+$$ LANGUAGE plpgsql;
+
+-- После проверки приложения:
+-- DROP TABLE company_clients_legacy;
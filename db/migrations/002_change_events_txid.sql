@@ -0,0 +1,33 @@
+-- Курсор ленты изменений (txid, id) для баз, созданных до его появления в db/init.sql.
+--   psql -v ON_ERROR_STOP=1 -f db/migrations/002_change_events_txid.sql
+--
+-- Существующие события получают txid = 0 (без перезаписи таблицы) и идут перед новыми
+-- в прежнем порядке id; старые числовые курсоры клиентов читаются как (0, id).
+
+ALTER TABLE change_events ADD COLUMN IF NOT EXISTS txid BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE change_events ALTER COLUMN txid SET DEFAULT pg_current_xact_id()::text::bigint;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_change_events_cursor ON change_events (txid, id);
+
+CREATE OR REPLACE FUNCTION notify_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_row RECORD;
+    v_data JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        v_row := OLD;
+        v_data := NULL;
+    ELSE
+        v_row := NEW;
+        v_data := to_jsonb(NEW);
+    END IF;
+    
+    INSERT INTO change_events (table_name, operation, row_id, data)
+    VALUES (TG_ARGV[0], TG_OP, v_row.id, v_data);
+    
+    PERFORM pg_notify('energy_changes', '');
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,7 @@
+-- Аренда выполняющихся запросов Idempotency-Key для баз, созданных до ее появления в db/init.sql.
+--   psql -v ON_ERROR_STOP=1 -f db/migrations/003_idempotency_keys_lease.sql
+--
+-- Незавершенные записи получают истекшую аренду: их повтор выполнится сразу, а не через сутки.
+
+ALTER TABLE idempotency_keys
+    ADD COLUMN IF NOT EXISTS locked_until TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
@@ -0,0 +1,71 @@
+import os
+import sys
+import pytest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INIT_SQL = os.path.join(ROOT, 'db', 'init.sql')
+
+# Приложение читает конфигурацию из окружения при импорте.
+# TEST_DATABASE_URL - отдельная БД PostgreSQL: схема public пересоздается из db/init.sql
+os.environ['DATABASE_URL'] = os.getenv('TEST_DATABASE_URL', 'sqlite://')
+os.environ['JOB_WORKERS'] = '0'
+os.environ.pop('PROFILING_TOKEN', None)
+os.environ.pop('CAPACITY_LEDGER_POINTS', None)
+sys.path.insert(0, os.path.join(ROOT, 'app'))
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'pg: нужна PostgreSQL в TEST_DATABASE_URL')
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ['DATABASE_URL'].startswith('postgresql'):
+        return
+    skip = pytest.mark.skip(reason='TEST_DATABASE_URL с PostgreSQL не задан')
+    for item in items:
+        if 'pg' in item.keywords:
+            item.add_marker(skip)
+
+
+def _reset_postgres(db):
+    with open(INIT_SQL, encoding='utf-8') as f:
+        sql = f.read()
+    connection = db.engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('DROP SCHEMA public CASCADE; CREATE SCHEMA public')
+            cursor.execute(sql)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app
+    from models import db
+    
+    with app.app_context():
+        if db.engine.dialect.name == 'postgresql':
+            _reset_postgres(db)
+        else:
+            # Те же данные, что и в db/init.sql
+            result = app.test_cli_runner().invoke(args=['init-db', '--seed'])
+            assert result.exit_code == 0, result.output
+    return app
+
+
+@pytest.fixture
+def session(app):
+    """Сессия БД в контексте приложения; изменения теста откатываются"""
+    from models import db
+    
+    with app.app_context():
+        yield db.session
+        db.session.rollback()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
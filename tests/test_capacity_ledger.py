@@ -0,0 +1,30 @@
+import pytest
+from error_handlers import APIError
+from services.capacity_ledger import CapacityLedger
+
+
+@pytest.fixture
+def ledger_config(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'CAPACITY_LEDGER_POINTS', [1, 2])
+    monkeypatch.setitem(app.config, 'CAPACITY_LEDGER_WORKERS', 2)
+    monkeypatch.setitem(app.config, 'CAPACITY_LEDGER_WORKER_INDEX', 0)
+    monkeypatch.setitem(app.config, 'CAPACITY_LEDGER_WAL_DIR', str(tmp_path))
+
+
+def test_processes_claim_distinct_slots(app, session, ledger_config):
+    # Каждый экземпляр держит свой flock, как отдельный воркер с тем же окружением
+    ledgers = [CapacityLedger(app) for _ in range(3)]
+    for ledger in ledgers:
+        ledger.start()
+    assert [ledger.worker_index for ledger in ledgers] == [0, 1, None]
+    
+    # Процесс без слота не падает, а отправляет к владельцу
+    with pytest.raises(APIError) as error:
+        ledgers[2].rent(2, 'Клиент 4', 10)
+    assert error.value.status_code == 421
+    assert error.value.payload == {'owner_worker_index': 0}
+    
+    # Слот завершившегося владельца забирает следующий процесс
+    ledgers[0]._lock_file.close()
+    ledgers[2].start()
+    assert ledgers[2].worker_index == 0
@@ -0,0 +1,42 @@
+from datetime import datetime
+import pytest
+from models import CompanyClient
+from services.company_client_service import CompanyClientService
+
+
+@pytest.fixture
+def customers(session):
+    rentals = [
+        CompanyClient(energy_supply_point_id=point_id, company_name='ООО Север', quantity_power=power,
+                      created_at=datetime(2024, 1, day))
+        for day, (point_id, power) in enumerate([(2, 40), (1, 10), (3, 30), (1, 20), (2, 50)], 1)
+    ]
+    rentals.append(CompanyClient(energy_supply_point_id=3, company_name='ооо северный ветер', quantity_power=5))
+    session.add_all(rentals)
+    session.flush()
+    return CompanyClientService()
+
+
+def test_rentals_are_capped_per_customer(customers):
+    page = customers.find_by_customer('ооо север', 'exact', 1, 20, 2, 0.3)
+    
+    assert page.total == 1
+    assert page.rentals_per_customer == 2
+    group = page.items[0]
+    assert (group.company_name, group.rentals_count, group.total_power_kw) == ('ООО Север', 5, 150)
+    assert [(rental.energy_supply_point_id, rental.quantity_power) for rental in group.rentals] == [(2, 40), (1, 10)]
+
+
+def test_prefix_ignores_case_of_non_ascii_names(customers):
+    page = customers.find_by_customer('ООО СЕВ', 'prefix', 1, 20, 20, 0.3)
+    
+    assert page.total == 2
+    assert [group.company_name for group in page.items] == ['ООО Север', 'ооо северный ветер']
+    assert [len(group.rentals) for group in page.items] == [5, 1]
+
+
+def test_customers_are_paged(customers):
+    page = customers.find_by_customer('ооо сев', 'prefix', 2, 1, 20, 0.3)
+    
+    assert page.total == 2
+    assert [group.company_name for group in page.items] == ['ооо северный ветер']
@@ -0,0 +1,26 @@
+import io
+import pytest
+from models import CompanyClient
+from repositories.export_repository import EXPORT_SPECS
+from services.export_service import ExportService, _csv_line
+
+
+def test_csv_line_follows_copy_quoting():
+    values = ['1', None, '', 'a,b', 'say "hi"', 'two\nlines', '2020-01-15 10:00:00.5', '1000.00']
+    assert _csv_line(values) == '1,,"","a,b","say ""hi""","two\nlines",2020-01-15 10:00:00.5,1000.00\n'
+
+
+@pytest.mark.pg
+@pytest.mark.parametrize('table', list(EXPORT_SPECS))
+def test_http_csv_matches_copy(session, table):
+    # Строка с кавычками и запятой, дробной мощностью и временем с микросекундами
+    session.add(CompanyClient(energy_supply_point_id=1, company_name='Клиент "Север", филиал', quantity_power=12.5))
+    session.flush()
+    
+    service = ExportService()
+    includes = list(EXPORT_SPECS[table]['includes'])
+    output = io.BytesIO()
+    service.write(table, 'csv', includes, 2, output)
+    streamed = b''.join(service.stream(table, 'csv', includes, 2))
+    
+    assert streamed == output.getvalue()
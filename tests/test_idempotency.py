@@ -0,0 +1,54 @@
+import time
+from sqlalchemy.exc import OperationalError
+from error_handlers import LOCK_NOT_AVAILABLE
+from repositories.stored_functions import PythonFunctions
+
+
+RENTAL = {'company_name': 'Клиент 5', 'quantity_power': 10}
+
+
+class LockNotAvailable(Exception):
+    """Ошибка драйвера, как у psycopg2 при lock_timeout"""
+    
+    pgcode = LOCK_NOT_AVAILABLE
+
+
+def rent(client, key, **headers):
+    return client.post('/api/energy-supply-points/3/rentals', json=RENTAL,
+                       headers={'Idempotency-Key': key, **headers})
+
+
+def test_lock_timeout_releases_key(client, monkeypatch):
+    def lock_timeout(self, point_id, company_name, quantity_power):
+        raise OperationalError('SELECT ... FOR UPDATE', {}, LockNotAvailable())
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(PythonFunctions, 'rent_energy', lock_timeout)
+        response = rent(client, 'lock-timeout')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    
+    response = rent(client, 'lock-timeout')
+    assert response.status_code == 201
+    assert response.headers['Idempotent-Replayed'] == 'false'
+    
+    response = rent(client, 'lock-timeout')
+    assert response.status_code == 201
+    assert response.headers['Idempotent-Replayed'] == 'true'
+
+
+def test_deadline_exceeded_releases_key(client, monkeypatch):
+    rent_energy = PythonFunctions.rent_energy
+    
+    def slow_rent_energy(self, *args):
+        time.sleep(0.05)
+        return rent_energy(self, *args)
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(PythonFunctions, 'rent_energy', slow_rent_energy)
+        response = rent(client, 'deadline', **{'X-Request-Deadline-Ms': '20'})
+    assert response.status_code == 504
+    
+    response = rent(client, 'deadline')
+    assert response.status_code == 201
+    assert response.headers['Idempotent-Replayed'] == 'false'
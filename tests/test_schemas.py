@@ -0,0 +1,54 @@
+import pytest
+
+
+COMPANY = {'name': 'ЭнергоСбыт', 'registration_date': '2022-06-01', 'status': 'active'}
+POINT = {'name': 'Точка Г1', 'connection_date': '2022-07-01', 'max_power_kw': 800}
+
+
+def import_companies(client, point):
+    return client.post('/api/companies/import', json={
+        'companies': [{**COMPANY, 'energy_supply_points': [POINT, point]}]
+    })
+
+
+def test_nested_missing_fields(client):
+    response = import_companies(client, {'max_power_kw': 100})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == (
+        'Missing required fields: companies[0].energy_supply_points[1].name, '
+        'companies[0].energy_supply_points[1].connection_date'
+    )
+
+
+@pytest.mark.parametrize('field, value, error', [
+    ('connection_date', '2022-13-01',
+     'Invalid date format at companies[0].energy_supply_points[1].connection_date. Use YYYY-MM-DD'),
+    ('max_power_kw', -5, 'companies[0].energy_supply_points[1].max_power_kw must be greater than 0'),
+    ('max_power_kw', 'много', 'companies[0].energy_supply_points[1].max_power_kw must be a valid number'),
+])
+def test_nested_invalid_value(client, field, value, error):
+    response = import_companies(client, {**POINT, field: value})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == error
+
+
+def test_nested_invalid_status(client):
+    response = client.post('/api/companies/import', json={'companies': [{**COMPANY, 'status': 'closed'}]})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == (
+        'Invalid status at companies[0].status. Must be one of: active, inactive, pending'
+    )
+
+
+def test_top_level_messages_are_unchanged(client):
+    response = client.post('/api/companies', json={'name': 'ЭнергоСбыт'})
+    assert response.get_json()['error'] == 'Missing required fields: registration_date, status'
+    
+    response = client.post('/api/companies', json={**COMPANY, 'registration_date': '01.06.2022'})
+    assert response.get_json()['error'] == 'Invalid date format. Use YYYY-MM-DD'
+
+
+def test_missing_query_parameter_is_named(client):
+    response = client.get('/api/company-clients/by-customer')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Missing required fields: name'
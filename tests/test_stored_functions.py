@@ -0,0 +1,58 @@
+from datetime import date
+from decimal import Decimal
+import pytest
+from repositories.stored_functions import BACKENDS, POINT_USED_POWER, compare_backends
+
+
+# Данные из db/init.sql (и flask init-db --seed):
+# компания 1 - точки 1 (1000 кВт, занято 500) и 2 (1500 кВт, занято 500)
+EMPTY_COMPANY_ID = 999
+MISSING_POINT_ID = 999
+
+
+@pytest.fixture
+def python_functions(session):
+    return BACKENDS['python']
+
+
+def test_company_statistics(python_functions):
+    assert python_functions.get_company_statistics(1) == (2, Decimal('2500'))
+
+
+def test_company_statistics_without_points(python_functions):
+    assert python_functions.get_company_statistics(EMPTY_COMPANY_ID) == (0, Decimal('0'))
+
+
+def test_rent_energy(python_functions):
+    assert python_functions.rent_energy(1, 'Клиент 4', 100.5) == (True, 'Energy rented successfully')
+    assert POINT_USED_POWER.execute({'point_id': 1}).scalar() == Decimal('600.5')
+
+
+def test_rent_energy_over_capacity(python_functions):
+    assert python_functions.rent_energy(1, 'Клиент 4', 600) == (
+        False, 'Insufficient power. Available: 500.00 kW, Requested: 600.0 kW'
+    )
+    assert POINT_USED_POWER.execute({'point_id': 1}).scalar() == Decimal('500')
+
+
+def test_rent_energy_missing_point(python_functions):
+    assert python_functions.rent_energy(MISSING_POINT_ID, 'Клиент 4', 1) == (
+        False, 'Energy supply point not found'
+    )
+
+
+@pytest.mark.parametrize('date_from, date_to, point_ids', [
+    (None, None, [4, 1, 2, 3]),
+    (date(2020, 2, 1), None, [1, 2, 3]),
+    (None, date(2020, 5, 15), [4, 1, 2]),
+    (date(2020, 2, 1), date(2020, 5, 15), [1, 2]),
+    (date(2021, 4, 1), date(2020, 1, 10), []),
+])
+def test_search_energy_supply_points(python_functions, date_from, date_to, point_ids):
+    rows = python_functions.search_energy_supply_points(date_from, date_to)
+    assert [row[0] for row in rows] == point_ids
+
+
+@pytest.mark.pg
+def test_backends_are_identical(session):
+    assert compare_backends() == []